@@ -0,0 +1,43 @@
+"""
+Run benchmark suite and print result as JSON
+
+    python3 -m benchmark [--quick] [--only register,graph] [--output result.json]
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+from benchmark.suite import BENCHMARKS, QUICK
+
+def main():
+    parser = argparse.ArgumentParser(prog="python3 -m benchmark")
+    parser.add_argument("--quick", action="store_true", help="Small iteration count, for smoke test")
+    parser.add_argument("--only", default=None, help="Comma separated benchmark name : {}".format(", ".join(BENCHMARKS)))
+    parser.add_argument("--output", default=None, help="Write JSON to file instead of stdout")
+    args = parser.parse_args()
+
+    names = args.only.split(",") if args.only else list(BENCHMARKS)
+    results = []
+    for name in names:
+        results += BENCHMARKS[name](**(QUICK[name] if args.quick else {}))
+
+    with open(os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), "VERSION")) as f:
+        version = f.readline().strip()
+
+    report = json.dumps({
+        "version": version,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "quick": args.quick,
+        "results": results
+    }, indent=2)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+    else:
+        sys.stdout.write(report + "\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Compare transient build of 5 level deep graph with and without compiled plan
+
+    python3 -m benchmark.bench_compile
+"""
+import timeit
+from easydi import *
+
+class Leaf:
+    def __init__(self, value):
+        self.value = value
+
+class Level1:
+    def __init__(self, leaf, value):
+        self.leaf = leaf
+        self.value = value
+
+class Level2:
+    def __init__(self, child, leaf):
+        self.child = child
+        self.leaf = leaf
+
+class Level3:
+    def __init__(self, child, leaf):
+        self.child = child
+        self.leaf = leaf
+
+class Level4:
+    def __init__(self, child, leaf):
+        self.child = child
+        self.leaf = leaf
+
+class Level5:
+    def __init__(self, child, leaf):
+        self.child = child
+        self.leaf = leaf
+
+class Config:
+    def get(self, name, placeholder=None, value_format=str):
+        return value_format(placeholder)
+
+def create_container():
+    container = Container()
+    container.register(Config, _config=True)
+    container.register(Leaf, [1, 2, 3])
+    container.register(Level1, Leaf, DependencyConfig("level1.value", 1, int))
+    container.register(Level2, Dependency(Level1, False), Leaf)
+    container.register(Level3, Dependency(Level2, False), Leaf)
+    container.register(Level4, Dependency(Level3, False), Leaf)
+    container.register(Level5, Dependency(Level4, False), Leaf)
+    return container
+
+def run(number=20000):
+    results = {}
+    for name, compiled in (("default", False), ("compiled", True)):
+        container = create_container()
+        if compiled:
+            container.compile()
+        factory = container.list()["_index"][Level5]
+        results[name] = min(timeit.repeat(factory.build, number=number, repeat=5)) / number
+    return results
+
+if __name__ == "__main__":
+    results = run()
+    for name, seconds in results.items():
+        print("{:<10} {:>10.2f} us/build".format(name, seconds * 1e6))
+    print("speedup    {:>10.2f}x".format(results["default"] / results["compiled"]))
@@ -0,0 +1,198 @@
+"""
+Benchmark of registration, resolution and lock contention hot path
+
+Every benchmark return a list of result dict
+    { "name" : str, "params" : dict, "seconds" : float per operation, "ops_per_sec" : float }
+Memory benchmark report "bytes_per_registration" instead of time
+"""
+import threading
+import time
+import timeit
+from easydi import *
+from benchmark import bench_compile
+from test import memory_layout
+
+class Config:
+    def __init__(self):
+        self._config = {"section{}".format(i): dict(("key{}".format(j), str(j)) for j in range(10)) for i in range(10)}
+
+    def get(self, name, placeholder=None, value_format=str):
+        section, key = name.split(".")
+        try:
+            value = self._config[section][key]
+        except KeyError:
+            value = placeholder
+        return value_format(value)
+
+def _init(self, *args, **kwargs):
+    self.args = args
+    self.kwargs = kwargs
+
+def create_classes(count, module="benchmark.generated"):
+    return [type("Generated{}".format(i), (), {"__module__": "{}.pkg{}".format(module, i % 100), "__init__": _init})
+            for i in range(count)]
+
+def _measure(fn, number, repeat=3):
+    return min(timeit.repeat(fn, number=number, repeat=repeat)) / number
+
+def _result(name, seconds, **params):
+    return {
+        "name": name,
+        "params": params,
+        "seconds": seconds,
+        "ops_per_sec": (1 / seconds) if seconds else None
+    }
+
+def bench_register(sizes=(1000, 10000, 100000)):
+    results = []
+    for size in sizes:
+        classes = create_classes(size)
+        container = Container()
+        start = time.perf_counter()
+        for cls in classes:
+            container.register(cls, DependencyConfig("section1.key1"), [1])
+        elapsed = time.perf_counter() - start
+        results.append(_result("register", elapsed / size, size=size, total_seconds=elapsed))
+    return results
+
+def _deep_container(depth):
+    classes = create_classes(depth, "benchmark.deep")
+    container = Container()
+    container.register(Config, _config=True)
+    container.register(classes[0], DependencyConfig("section1.key1"))
+    for parent, child in zip(classes[1:], classes):
+        container.register(parent, Dependency(child, False), DependencyConfig("section2.key2"))
+    return container, classes[-1]
+
+def _wide_container(width):
+    classes = create_classes(width + 1, "benchmark.wide")
+    container = Container()
+    container.register(Config, _config=True)
+    for cls in classes[1:]:
+        container.register(cls, DependencyConfig("section1.key1"))
+    container.register(classes[0], *[Dependency(cls, False) for cls in classes[1:]])
+    return container, classes[0]
+
+def bench_graph(depth=10, width=50, number=2000):
+    results = []
+    for shape, (container, root) in (("deep", _deep_container(depth)), ("wide", _wide_container(width))):
+        size = depth if shape == "deep" else width
+        for compiled in (False, True):
+            if compiled:
+                container.compile()
+            factory = container.list()["_index"][root]
+            results.append(_result("graph.build", _measure(factory.build, number),
+                                   shape=shape, size=size, compiled=compiled))
+            factory.instance()
+            results.append(_result("graph.instance", _measure(factory.instance, number * 10),
+                                   shape=shape, size=size, compiled=compiled))
+
+    for name, seconds in bench_compile.run(number).items():
+        results.append(_result("graph.level5.build", seconds, compiled=(name == "compiled")))
+    return results
+
+def bench_memory_layout(count=2000):
+    # Memory benchmark report bytes per registration instead of time
+    return [{"name": "memory.register", "params": {"layout": layout, "count": count},
+             "bytes_per_registration": size}
+            for layout, size in memory_layout.run(count).items()]
+
+def bench_resolve_many(sizes=(10, 20), number=2000):
+    results = []
+    for size in sizes:
+        container, root = _wide_container(size)
+        classes = [obj.class_object for obj in container.list_object_factories() if obj.class_object is not root]
+        classes = [cls for cls in classes if cls is not Config][:size]
+
+        def separate():
+            return [container.list()["_index"][cls].instance() for cls in classes]
+
+        results.append(_result("resolve.separate", _measure(separate, number), size=size))
+        results.append(_result("resolve.many", _measure(lambda: container.resolve_many(classes), number), size=size))
+    return results
+
+def bench_group(members=(10, 100, 1000), number=200):
+    results = []
+    for size in members:
+        container = Container()
+        classes = create_classes(size, "benchmark.group")
+        for cls in classes:
+            container.register(cls, _group="members")
+        containers = container.list()
+        for single_instance in (True, False):
+            group = DependencyGroup("members", False, single_instance)
+            results.append(_result("group.build", _measure(lambda: group.build(containers), number),
+                                   members=size, single_instance=single_instance))
+    return results
+
+def bench_config(number=20000):
+    container = Container()
+    container.register(Config, _config=True)
+    containers = container.list()
+    results = []
+    for name, dependency in (("config.found", DependencyConfig("section5.key5")),
+                             ("config.placeholder", DependencyConfig("section5.missing", "0", int))):
+        results.append(_result(name, _measure(lambda: dependency.build(containers), number)))
+    return results
+
+def bench_update(sizes=(1000, 10000)):
+    results = []
+    for size in sizes:
+        base = Container()
+        for cls in create_classes(size, "benchmark.base"):
+            base.register(cls)
+        other = Container()
+        for cls in create_classes(size // 10, "benchmark.other"):
+            other.register(cls)
+
+        start = time.perf_counter()
+        base.update(other)
+        results.append(_result("update", time.perf_counter() - start, base=size, other=size // 10))
+    return results
+
+def bench_contention(threads=(1, 2, 4, 8), number=5000):
+    results = []
+    for frozen in (False, True):
+        container, root = _deep_container(5)
+        if frozen:
+            container.freeze()
+        factory = container.list()["_index"][root]
+
+        for thread_count in threads:
+            def worker():
+                for i in range(number):
+                    factory.build()
+
+            workers = [threading.Thread(target=worker) for i in range(thread_count)]
+            start = time.perf_counter()
+            for thread in workers:
+                thread.start()
+            for thread in workers:
+                thread.join()
+            elapsed = time.perf_counter() - start
+
+            results.append(_result("contention.build", elapsed / (number * thread_count),
+                                   threads=thread_count, frozen=frozen))
+    return results
+
+BENCHMARKS = {
+    "register": bench_register,
+    "graph": bench_graph,
+    "group": bench_group,
+    "config": bench_config,
+    "update": bench_update,
+    "contention": bench_contention,
+    "memory": bench_memory_layout,
+    "resolve": bench_resolve_many
+}
+
+QUICK = {
+    "register": {"sizes": (1000,)},
+    "graph": {"number": 100},
+    "group": {"members": (10,), "number": 20},
+    "config": {"number": 1000},
+    "update": {"sizes": (1000,)},
+    "contention": {"threads": (1, 2), "number": 200},
+    "memory": {"count": 500},
+    "resolve": {"sizes": (10,), "number": 200}
+}
@@ -1,41 +1,204 @@
+import asyncio
 import collections
+import collections.abc
+import concurrent.futures
+import contextlib
+import contextvars
+import gc
+import importlib
 import inspect
+import json
 import sys
+import threading
+import time
 import logging
+import operator
+import os
 import traceback
+import types
+import typing
+import weakref
 from readerwriterlock import rwlock
 from pprint import pprint
 
 _THREADING_LOCK = rwlock.RWLockWrite()
+_RESERVED_KEYS = ("_group", "_alias", "_config", "_index", "_instrument", "_config_cache", "_deferred", "_graph",
+                  "_memory_budget", "_callback_cache")
+_SCOPE = contextvars.ContextVar("easydi_scope", default=None)
+_GRAPH = contextvars.ContextVar("easydi_graph", default=None)
+_GRAPH_SCOPE = "graph"
+_TRACE = contextvars.ContextVar("easydi_trace", default=None)
+# ObjectFactory being created by the current async resolution chain
+_ACREATING = contextvars.ContextVar("easydi_acreating", default=())
+_FACTORY_LOCK = threading.Lock()
+# Graph is shared with worker thread of parallel DependencyGroup
+_GRAPH_LOCK = threading.Lock()
+# Container prepared using Container.prefork(), reset in forked child process
+_FORK_CONTAINERS = weakref.WeakSet()
+# Parameter plan of autowired class, introspected once per class
+_AUTOWIRE_PLANS = weakref.WeakKeyDictionary()
+_MISSING = object()
+_EMPTY_KWARGS = types.MappingProxyType({})
+
+def _is_factory_object(obj):
+    """
+    Class or function ( e.g. async factory function ) that can be registered
+    """
+    return inspect.isclass(obj) or inspect.isfunction(obj)
 
 def _retrieve_class_path(obj):
-    if not inspect.isclass(obj):
-        raise Exception("Object must be a class")
+    if isinstance(obj, str):
+        module, qualname = _split_import_path(obj)
+        return module.split(".") + [qualname]
+
+    if not _is_factory_object(obj):
+        raise Exception("Object must be a class or function")
     paths = obj.__module__.split(".")
     paths.append(obj.__qualname__)
 
     return paths
 
-class ObjectFactoryMap(dict):
-    def __init__(self, *args, **kwargs):
-        self.update(*args, **kwargs)
+def _split_import_path(import_path):
+    """
+    Split "package.module:Class" import string to module and qualified name
+    """
+    module, separator, qualname = import_path.partition(":")
+    if not separator or not module or not qualname:
+        raise Exception("Import path {} must be in package.module:Class format".format(import_path))
+    return module, qualname
+
+def _run_plan(plan, args=(), kwargs=None):
+    """
+    Execute compiled resolution plan, plan is a list of ( callable, arg sources, kwarg sources, owner )
+    in dependency order
+    Source is ( True, step index ) for value created by previous step or ( False, value ) for constant
+    Owner is the class created by the step, its error is reported the same way as uncompiled build
+    Step without owner ( factory, callback ) raise its own error
+    Last step create the requested object, args and kwargs are passed to it
+    """
+    values = []
+    last = len(plan) - 1
+    for step, (fn, arg_sources, kwarg_sources, owner) in enumerate(plan):
+        step_args = [values[val] if from_step else val for from_step, val in arg_sources]
+        step_kwargs = dict((key, values[val] if from_step else val) for key, from_step, val in kwarg_sources)
+
+        if step == last:
+            step_args.extend(args)
+            if kwargs:
+                step_kwargs.update(kwargs)
+
+        if owner is None:
+            values.append(fn(*step_args, **step_kwargs))
+            continue
+
+        try:
+            values.append(fn(*step_args, **step_kwargs))
+        except Exception as e:
+            logging.getLogger("easydi.ObjectFactory").debug(sys.exc_info())
+            raise Exception("Unable to create {} instance.".format(owner)) from e
+
+    return values[-1]
+
+def _compile_instance(obj, plan, args, kwargs):
+    """
+    Singleton is bound to the plan, scoped, pooled and fork unsafe instance must be retrieved on each run
+    """
+    if obj.singleton and obj.fork_safe:
+        return (False, obj.instance(*args, **kwargs))
+
+    plan.append((obj.instance, tuple((False, arg) for arg in args),
+                 tuple((key, False, val) for key, val in kwargs.items()), None))
+    return (True, len(plan) - 1)
+
+def _lookup_factory(containers, key):
+    """
+    Return registered ObjectFactory by class object or full dotted path, None if not registered
+    """
+    obj = containers["_index"].get(key)
+
+    if obj is None and not isinstance(key, str):
+        # Class registered by import string is indexed by path until it is imported
+        deferred = dict.get(containers, "_deferred")
+        if deferred:
+            path = ".".join(_retrieve_class_path(key))
+            if path in deferred:
+                return containers["_index"].get(path)
+    return obj
+
+def _autowire_plan(class_object):
+    """
+    Return tuple of ( parameter name, dependency object or class, has default ) from class __init__
+    or factory function annotation. Dependency is None when annotation can not be resolved
+    """
+    try:
+        return _AUTOWIRE_PLANS[class_object]
+    except KeyError:
+        pass
+
+    target = class_object.__init__ if inspect.isclass(class_object) else class_object
+    try:
+        try:
+            hints = typing.get_type_hints(target, include_extras=True)
+        except TypeError:
+            hints = typing.get_type_hints(target)
+        parameters = inspect.signature(class_object).parameters
+    except Exception as e:
+        raise Exception("Unable to read {} annotation for autowire".format(class_object)) from e
+
+    plan = tuple((name, _autowire_target(hints.get(name)), parameter.default is not parameter.empty)
+                 for name, parameter in parameters.items()
+                 if parameter.kind not in (parameter.VAR_POSITIONAL, parameter.VAR_KEYWORD))
+    _AUTOWIRE_PLANS[class_object] = plan
+    return plan
+
+def _autowire_target(hint):
+    """
+    Annotated[str, DependencyConfig(...)] return the dependency object, Optional[X] and X return class X
+    """
+    if hint is None:
+        return None
+
+    if typing.get_origin(hint) is getattr(typing, "Annotated", _MISSING):
+        for metadata in hint.__metadata__:
+            if isinstance(metadata, _DEPENDENCY_TYPES):
+                return metadata
+        hint = typing.get_args(hint)[0]
+
+    if typing.get_origin(hint) is typing.Union:
+        args = [arg for arg in typing.get_args(hint) if arg is not type(None)]
+        if len(args) == 1:
+            hint = args[0]
+
+    return hint if inspect.isclass(hint) else None
 
-        for arg in args:
-            if isinstance(arg, dict):
-                for k, v in arg.items():
-                    self[k] = v
+def _map_get(objects, key, default=None):
+    # Registered key named like a dict method hide the method on attribute access
+    return type(objects).get(objects, key, default)
 
-        if kwargs:
-            for k, v in kwargs.items():
-                self[k] = v
+def _map_items(objects):
+    return type(objects).items(objects)
+
+class ObjectFactoryMap(dict):
+    # Item is accessible as attribute through __getattr__, no instance __dict__ required
+    __slots__ = ()
+
+    def __init__(self, *args, **kwargs):
+        for k, v in dict(*args, **kwargs).items():
+            self[k] = v
 
     def __getitem__(self, key):
         with _THREADING_LOCK.gen_rlock():
             val = dict.__getitem__(self, key)
         return val
 
+    def __getattribute__(self, attr):
+        # Registered key take precedence over dict method, e.g. module named items
+        if attr[0] != "_" and type(self).__contains__(self, attr):
+            return type(self).__getitem__(self, attr)
+        return object.__getattribute__(self, attr)
+
     def __getattr__(self, attr):
-        return self.get(attr)
+        return type(self).get(self, attr)
 
     def __setattr__(self, key, value):
         self.__setitem__(key, value)
@@ -43,7 +206,6 @@ class ObjectFactoryMap(dict):
     def __setitem__(self, key, value):
         with _THREADING_LOCK.gen_wlock():
             super(ObjectFactoryMap, self).__setitem__(key, value)
-            self.__dict__.update({key: value})
 
     def __delattr__(self, item):
         self.__delitem__(item)
@@ -51,7 +213,1249 @@ class ObjectFactoryMap(dict):
     def __delitem__(self, key):
         with _THREADING_LOCK.gen_wlock():
             super(ObjectFactoryMap, self).__delitem__(key)
-            del self.__dict__[key]
+
+class FrozenObjectFactoryMap(ObjectFactoryMap):
+    """
+    FrozenObjectFactoryMap
+
+    Read only snapshot of ObjectFactoryMap, created by Container.freeze()
+    Lookup does not acquire any lock, any mutation will raise an Exception
+    """
+    __slots__ = ()
+
+    def __init__(self, *args, **kwargs):
+        dict.__init__(self, *args, **kwargs)
+
+    def __getitem__(self, key):
+        return dict.__getitem__(self, key)
+
+    def __readonly(self, *args, **kwargs):
+        raise Exception("Container is frozen, registry can not be modified")
+
+    __setattr__ = __readonly
+    __setitem__ = __readonly
+    __delattr__ = __readonly
+    __delitem__ = __readonly
+    clear = __readonly
+    pop = __readonly
+    popitem = __readonly
+    setdefault = __readonly
+    update = __readonly
+
+class ObjectFactoryOverlayMap(ObjectFactoryMap):
+    """
+    ObjectFactoryOverlayMap
+
+    Read only view of an overlay container registry on top of its parent registry, created by Container.overlay()
+    Lookup fall through to parent when key is not registered in the overlay, nothing is copied
+    Nested map is combined on access, group member list is parent member followed by overlay member
+    """
+    __slots__ = ("_own", "_parent", "_layer")
+
+    def __init__(self, own, parent, layer, **reserved):
+        # Reserved entry ( index, instrumentation, ... ) is stored in the view itself
+        dict.__init__(self, reserved)
+        object.__setattr__(self, "_own", own)
+        object.__setattr__(self, "_parent", parent)
+        object.__setattr__(self, "_layer", layer)
+
+    def __getitem__(self, key):
+        if dict.__contains__(self, key):
+            return dict.__getitem__(self, key)
+
+        own = _MISSING if self._own is None else dict.get(self._own, key, _MISSING)
+        parent = _MISSING if self._parent is None else _map_get(self._parent, key, _MISSING)
+
+        if own is _MISSING and parent is _MISSING:
+            raise KeyError(key)
+
+        if own is _MISSING or own is None:
+            return own if parent is _MISSING else self.__from_parent(parent)
+
+        if isinstance(own, ObjectFactoryMap) and isinstance(parent, ObjectFactoryMap):
+            return ObjectFactoryOverlayMap(own, parent, self._layer)
+
+        if isinstance(own, (list, tuple)) and isinstance(parent, (list, tuple)):
+            paths = set(obj.path for obj in own)
+            return [self._layer.wrap(obj) for obj in parent if obj.path not in paths] + list(own)
+
+        return own
+
+    def __from_parent(self, parent):
+        if isinstance(parent, ObjectFactoryMap):
+            return ObjectFactoryOverlayMap(None, parent, self._layer)
+        if isinstance(parent, (list, tuple)):
+            return [self._layer.wrap(obj) for obj in parent]
+        return self._layer.wrap(parent)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        keys = dict.fromkeys(dict.keys(self))
+        for source in (self._own, self._parent):
+            if source is not None:
+                keys.update(dict.fromkeys(type(source).keys(source)))
+        return list(keys)
+
+    def items(self):
+        return [(key, self[key]) for key in ObjectFactoryOverlayMap.keys(self)]
+
+    def values(self):
+        return [self[key] for key in ObjectFactoryOverlayMap.keys(self)]
+
+    def __iter__(self):
+        return iter(ObjectFactoryOverlayMap.keys(self))
+
+    def __len__(self):
+        return len(ObjectFactoryOverlayMap.keys(self))
+
+    def __contains__(self, key):
+        return (dict.__contains__(self, key)
+                or (self._own is not None and key in self._own)
+                or (self._parent is not None and key in self._parent))
+
+    def __repr__(self):
+        return "ObjectFactoryOverlayMap({})".format(dict(ObjectFactoryOverlayMap.items(self)))
+
+    def __readonly(self, *args, **kwargs):
+        raise Exception("Overlay registry is read only, register object using Container.register()")
+
+    __setattr__ = __readonly
+    __setitem__ = __readonly
+    __delattr__ = __readonly
+    __delitem__ = __readonly
+    clear = __readonly
+    pop = __readonly
+    popitem = __readonly
+    setdefault = __readonly
+    update = __readonly
+
+class OverlayIndex(collections.abc.Mapping):
+    """
+    OverlayIndex
+
+    Flat index of an overlay container, fall through to parent index when not registered in the overlay
+    """
+    __slots__ = ("_own", "_parent", "_layer")
+
+    def __init__(self, own, parent, layer):
+        self._own = own
+        self._parent = parent
+        self._layer = layer
+
+    def get(self, key, default=None):
+        obj = self._own.get(key)
+        if obj is None:
+            obj = self._parent["_index"].get(key)
+            if obj is None:
+                return default
+            obj = self._layer.wrap(obj)
+        return obj
+
+    def __getitem__(self, key):
+        obj = self.get(key)
+        if obj is None:
+            raise KeyError(key)
+        return obj
+
+    def __setitem__(self, key, value):
+        self._own[key] = value
+
+    def __iter__(self):
+        return iter(dict.fromkeys(list(self._own) + list(self._parent["_index"])))
+
+    def __len__(self):
+        return len(dict.fromkeys(list(self._own) + list(self._parent["_index"])))
+
+class _OverlayLayer:
+    """
+    Decide whether parent object is shared with the overlay or replaced by a layer local copy
+    Local copy keep its own singleton and resolve dependency through the overlay
+    """
+    __slots__ = ("shared", "containers", "__clones", "__lock")
+
+    def __init__(self, shared):
+        self.shared = shared
+        self.containers = None
+        self.__clones = {}
+        self.__lock = threading.Lock()
+
+    def wrap(self, obj):
+        if self.shared or not isinstance(obj, ObjectFactory):
+            return obj
+
+        try:
+            return self.__clones[obj]
+        except KeyError:
+            pass
+
+        with self.__lock:
+            clone = self.__clones.get(obj)
+            if clone is None:
+                clone = self.__clones[obj] = obj.clone(self.containers)
+            return clone
+
+    def _after_fork(self):
+        self.__lock = threading.Lock()
+
+    def update_containers(self, containers):
+        self.containers = containers
+        for clone in list(self.__clones.values()):
+            clone.update_containers(containers)
+
+def _dispose(instance):
+    """
+    Release resource held by instance using close() or context manager exit
+    """
+    close = getattr(instance, "close", None)
+    if callable(close):
+        return close()
+
+    exit = getattr(instance, "__exit__", None)
+    if callable(exit):
+        return exit(None, None, None)
+
+async def _adispose(instance, in_thread=False):
+    """
+    in_thread : run synchronous close() in executor so the event loop is not blocked
+    """
+    close = getattr(instance, "aclose", None)
+    if callable(close):
+        return await close()
+
+    exit = getattr(instance, "__aexit__", None)
+    if callable(exit):
+        return await exit(None, None, None)
+
+    if in_thread:
+        context = contextvars.copy_context()
+        result = await asyncio.get_running_loop().run_in_executor(None, context.run, _dispose, instance)
+    else:
+        result = _dispose(instance)
+    if inspect.isawaitable(result):
+        return await result
+    return result
+
+def _find_scope(name):
+    scope = _SCOPE.get()
+    while scope is not None and scope.name != name:
+        scope = scope.parent
+    return scope
+
+class Scope:
+    """
+    Scope
+
+    Keep instance of object registered with _scope=<name> until the scope end
+    Active scope is stored in contextvars, so each thread / asyncio task has its own scope
+
+        with container.scope("request"):
+            ...
+
+        async with container.scope("request"):
+            ...
+
+    Instance created in the scope are disposed in reverse order when scope end
+    Pooled instance checked out in the scope is returned to its pool instead
+    """
+    def __init__(self, name="request"):
+        self.__name = name
+        self.__parent = None
+        self.__token = None
+        self.__instances = {}
+        self.__futures = {}
+        self.__releases = {}
+        self.__lock = threading.RLock()
+
+    @property
+    def name(self):
+        return self.__name
+
+    @property
+    def parent(self):
+        return self.__parent
+
+    def instance(self, factory, create, *args, **kwargs):
+        try:
+            return self.__instances[factory]
+        except KeyError:
+            pass
+
+        with self.__lock:
+            if factory not in self.__instances:
+                self.__instances[factory] = create(*args, **kwargs)
+            return self.__instances[factory]
+
+    async def ainstance(self, factory, create, *args, **kwargs):
+        try:
+            return self.__instances[factory]
+        except KeyError:
+            pass
+
+        future = self.__futures.get(factory)
+        if future is None:
+            future = asyncio.ensure_future(create(*args, **kwargs))
+            self.__futures[factory] = future
+
+        try:
+            instance = await asyncio.shield(future)
+        finally:
+            if future.done():
+                self.__futures.pop(factory, None)
+
+        self.__instances.setdefault(factory, instance)
+        return self.__instances[factory]
+
+    def checkout(self, factory, pool):
+        """
+        Check out one pooled instance per scope, it is returned to the pool when scope end
+        """
+        try:
+            return self.__instances[factory]
+        except KeyError:
+            pass
+
+        with self.__lock:
+            if factory not in self.__instances:
+                self.__instances[factory] = pool.acquire()
+                self.__releases[factory] = pool.release
+            return self.__instances[factory]
+
+    async def acheckout(self, factory, pool):
+        try:
+            return self.__instances[factory]
+        except KeyError:
+            pass
+
+        # Waiting for exhausted pool must not block the event loop
+        context = contextvars.copy_context()
+        instance = await asyncio.get_running_loop().run_in_executor(None, context.run, pool.acquire)
+
+        with self.__lock:
+            if factory in self.__instances:
+                pool.release(instance)
+            else:
+                self.__instances[factory] = instance
+                self.__releases[factory] = pool.release
+            return self.__instances[factory]
+
+    def __pop_instances(self):
+        with self.__lock:
+            instances = list(self.__instances.items())
+            releases = self.__releases
+            self.__instances.clear()
+            self.__releases = {}
+        return [(instance, releases.get(factory)) for factory, instance in reversed(instances)]
+
+    def close(self):
+        for instance, release in self.__pop_instances():
+            try:
+                if release is not None:
+                    release(instance)
+                else:
+                    _dispose(instance)
+            except:
+                logging.getLogger("easydi.Scope").debug(sys.exc_info())
+
+    async def aclose(self):
+        for instance, release in self.__pop_instances():
+            try:
+                if release is not None:
+                    release(instance)
+                else:
+                    await _adispose(instance)
+            except Exception:
+                logging.getLogger("easydi.Scope").debug(sys.exc_info())
+
+    def __enter__(self):
+        self.__parent = _SCOPE.get()
+        self.__token = _SCOPE.set(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        _SCOPE.reset(self.__token)
+        self.__token = None
+        self.close()
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, *exc_info):
+        _SCOPE.reset(self.__token)
+        self.__token = None
+        await self.aclose()
+
+class ObjectPool:
+    """
+    ObjectPool
+
+    Bounded pool of reusable instance, created for object registered with _pool=<max size>
+    Instance is created on demand up to max size, retrieve using factory.pool
+
+        with factory.checkout() as client:
+            ...
+
+    Arguments:
+        max_size     : maximum number of instance, idle and in use
+        timeout      : seconds to wait when pool is exhausted, None wait forever, 0 fail immediately
+        idle_timeout : idle instance older than this in seconds is disposed, None keep forever
+        dispose      : called to dispose instance, default to close() or context manager exit
+    """
+    def __init__(self, create, max_size, timeout=None, idle_timeout=None, dispose=None):
+        if not isinstance(max_size, int) or isinstance(max_size, bool) or max_size < 1:
+            raise Exception("Pool size must be a positive integer")
+
+        self.max_size = max_size
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.__create = create
+        self.__dispose_instance = dispose or _dispose
+        # Most recently returned instance is at the right end
+        self.__idle = collections.deque()
+        self.__size = 0
+        self.__waiting = 0
+        self.__closed = False
+        # Instance checked out before clear() is disposed when returned
+        self.__generation = 0
+        self.__checked_out = {}
+        self.__counters = {"created": 0, "checkouts": 0, "timeouts": 0, "evicted": 0}
+        self.__condition = threading.Condition(threading.Lock())
+
+    def acquire(self, timeout=_MISSING):
+        """
+        Take an idle instance or create a new one, must be returned using release()
+        """
+        timeout = self.timeout if timeout is _MISSING else timeout
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        with self.__condition:
+            expired = self.__pop_expired()
+            while True:
+                if self.__closed:
+                    raise Exception("Pool is closed")
+
+                if len(self.__idle):
+                    instance = self.__idle.pop()[0]
+                    self.__counters["checkouts"] += 1
+                    self.__checked_out[id(instance)] = self.__generation
+                    break
+
+                if self.__size < self.max_size:
+                    # Reserve the slot, instance is created outside the lock
+                    self.__size += 1
+                    instance = _MISSING
+                    break
+
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    self.__counters["timeouts"] += 1
+                    raise Exception("Pool exhausted, no instance available after {} seconds".format(timeout))
+
+                self.__waiting += 1
+                try:
+                    self.__condition.wait(remaining)
+                finally:
+                    self.__waiting -= 1
+
+        self.__dispose(expired)
+        if instance is not _MISSING:
+            return instance
+
+        try:
+            instance = self.__create()
+        except:
+            with self.__condition:
+                self.__size -= 1
+                self.__condition.notify()
+            raise
+
+        with self.__condition:
+            self.__counters["created"] += 1
+            self.__counters["checkouts"] += 1
+            self.__checked_out[id(instance)] = self.__generation
+        return instance
+
+    def release(self, instance):
+        with self.__condition:
+            generation = self.__checked_out.pop(id(instance), self.__generation)
+            if self.__closed or generation != self.__generation:
+                self.__size -= 1
+                expired = [instance]
+                self.__condition.notify()
+            else:
+                self.__idle.append((instance, time.monotonic()))
+                expired = self.__pop_expired()
+                self.__condition.notify()
+        self.__dispose(expired)
+
+    def discard(self, instance):
+        """
+        Dispose checked out instance instead of returning it, e.g. broken connection
+        """
+        with self.__condition:
+            self.__checked_out.pop(id(instance), None)
+            self.__size -= 1
+            self.__condition.notify()
+        self.__dispose([instance])
+
+    @contextlib.contextmanager
+    def checkout(self, timeout=_MISSING):
+        instance = self.acquire(timeout)
+        try:
+            yield instance
+        finally:
+            self.release(instance)
+
+    def evict_idle(self):
+        """
+        Dispose idle instance older than idle_timeout, return number of evicted instance
+        """
+        with self.__condition:
+            expired = self.__pop_expired()
+        self.__dispose(expired)
+        return len(expired)
+
+    def __pop_expired(self):
+        expired = []
+        if self.idle_timeout is None:
+            return expired
+
+        limit = time.monotonic() - self.idle_timeout
+        while len(self.__idle) and self.__idle[0][1] <= limit:
+            expired.append(self.__idle.popleft()[0])
+        self.__size -= len(expired)
+        self.__counters["evicted"] += len(expired)
+        if len(expired):
+            self.__condition.notify(len(expired))
+        return expired
+
+    def __dispose(self, instances):
+        for instance in instances:
+            try:
+                self.__dispose_instance(instance)
+            except:
+                logging.getLogger("easydi.ObjectPool").debug(sys.exc_info())
+
+    def stats(self):
+        """
+        Return { max_size, size, idle, in_use, waiting, created, checkouts, timeouts, evicted }
+        """
+        with self.__condition:
+            return dict(max_size=self.max_size, size=self.__size, idle=len(self.__idle),
+                        in_use=self.__size - len(self.__idle), waiting=self.__waiting, **self.__counters)
+
+    def _after_fork(self, drop=False):
+        """
+        Reset pool state in forked child, thread holding checked out instance does not exist in the child
+        drop : forget idle instance inherited from parent without disposing it
+        """
+        if drop:
+            self.__idle.clear()
+        self.__checked_out = {}
+        self.__size = len(self.__idle)
+        self.__waiting = 0
+        self.__condition = threading.Condition(threading.Lock())
+
+    def clear(self):
+        """
+        Dispose idle instance, instance still in use is disposed when returned. Pool create new instance afterward
+        """
+        with self.__condition:
+            self.__generation += 1
+            instances = [instance for instance, _ in self.__idle]
+            self.__idle.clear()
+            self.__size -= len(instances)
+            self.__condition.notify_all()
+        self.__dispose(instances)
+
+    def close(self):
+        """
+        Dispose idle instance, instance still in use is disposed when returned. Pool can not be used afterward
+        """
+        with self.__condition:
+            self.__closed = True
+            instances = [instance for instance, _ in self.__idle]
+            self.__idle.clear()
+            self.__size -= len(instances)
+            self.__condition.notify_all()
+        self.__dispose(instances)
+
+class InstanceCache:
+    """
+    InstanceCache
+
+    Keep one instance per instance() arguments, created for object registered with _cache=<max size>
+    Least recently used instance is evicted when max size is reached, instance older than ttl is created again
+    Evicted instance is only dropped from the cache, it is not disposed
+
+        container.register(TenantClient, _cache=128, _cache_ttl=600)
+        container.my_project.TenantClient.instance("tenant-a")
+
+    Concurrent call with the same arguments share a single creation
+    """
+    def __init__(self, max_size, ttl=None):
+        if not isinstance(max_size, int) or isinstance(max_size, bool) or max_size < 1:
+            raise Exception("Cache size must be a positive integer")
+
+        self.max_size = max_size
+        self.ttl = ttl
+        # key => ( instance, created time ), least recently used first
+        self.__instances = collections.OrderedDict()
+        self.__pending = {}
+        self.__futures = {}
+        self.__counters = {"hits": 0, "misses": 0, "evictions": 0, "expired": 0}
+        self.__lock = threading.Lock()
+
+    @staticmethod
+    def key(args, kwargs):
+        key = (tuple(args), tuple(sorted(kwargs.items())) if kwargs else ())
+        try:
+            hash(key)
+        except TypeError:
+            raise Exception("Cached instance arguments must be hashable")
+        return key
+
+    def __lookup(self, key):
+        entry = self.__instances.get(key)
+        if entry is None:
+            return _MISSING
+
+        if self.ttl is not None and time.monotonic() - entry[1] >= self.ttl:
+            del self.__instances[key]
+            self.__counters["expired"] += 1
+            return _MISSING
+
+        self.__instances.move_to_end(key)
+        self.__counters["hits"] += 1
+        return entry[0]
+
+    def __store(self, key, instance):
+        self.__instances[key] = (instance, time.monotonic())
+        self.__instances.move_to_end(key)
+        while len(self.__instances) > self.max_size:
+            self.__instances.popitem(last=False)
+            self.__counters["evictions"] += 1
+
+    def instance(self, create, args=(), kwargs=None):
+        key = self.key(args, kwargs)
+
+        with self.__lock:
+            instance = self.__lookup(key)
+            if instance is not _MISSING:
+                return instance
+
+            pending = self.__pending.get(key)
+            owner = pending is None
+            if owner:
+                self.__counters["misses"] += 1
+                pending = self.__pending[key] = (concurrent.futures.Future(), threading.get_ident())
+            elif pending[1] == threading.get_ident():
+                raise Exception("Circular dependency detected while creating cached instance {}".format(key))
+
+        future = pending[0]
+        if not owner:
+            # Other thread is creating the same instance
+            return future.result()
+
+        try:
+            instance = create(*args, **(kwargs or {}))
+        except BaseException as e:
+            with self.__lock:
+                self.__pending.pop(key, None)
+            future.set_exception(e)
+            raise
+
+        with self.__lock:
+            self.__store(key, instance)
+            self.__pending.pop(key, None)
+        future.set_result(instance)
+        return instance
+
+    async def ainstance(self, create, args=(), kwargs=None):
+        key = self.key(args, kwargs)
+
+        with self.__lock:
+            instance = self.__lookup(key)
+            if instance is not _MISSING:
+                return instance
+
+            future = self.__futures.get(key)
+            if future is None:
+                self.__counters["misses"] += 1
+                future = self.__futures[key] = asyncio.ensure_future(create(*args, **(kwargs or {})))
+                future.add_done_callback(lambda future: self.__set_future_instance(key, future))
+
+        return await asyncio.shield(future)
+
+    def __set_future_instance(self, key, future):
+        with self.__lock:
+            self.__futures.pop(key, None)
+            if not future.cancelled() and future.exception() is None:
+                self.__store(key, future.result())
+
+    def invalidate(self, *args, **kwargs):
+        """
+        Drop instance created with the given arguments, return True when it was cached
+        """
+        key = self.key(args, kwargs)
+        with self.__lock:
+            return self.__instances.pop(key, None) is not None
+
+    def clear(self):
+        with self.__lock:
+            self.__instances.clear()
+
+    def _pop_all(self):
+        """
+        Remove and return every cached instance
+        """
+        with self.__lock:
+            instances = [instance for instance, _ in self.__instances.values()]
+            self.__instances.clear()
+        return instances
+
+    def _after_fork(self, clear=False):
+        # Pending creation belong to thread of the parent process
+        self.__lock = threading.Lock()
+        self.__pending = {}
+        self.__futures = {}
+        if clear:
+            self.__instances.clear()
+
+    def stats(self):
+        """
+        Return { max_size, size, hits, misses, evictions, expired }
+        """
+        with self.__lock:
+            return dict(max_size=self.max_size, size=len(self.__instances), **self.__counters)
+
+def _retained_size(obj, limit=100000):
+    """
+    Approximate memory retained by obj, sum of sys.getsizeof of every object reachable from it
+    Class, module, function and registry object is shared and not counted, walk stop after limit object
+    """
+    shared = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType,
+              ObjectFactory, ObjectFactoryMap, Container)
+    seen = set()
+    pending = [obj]
+    size = 0
+    while pending and len(seen) < limit:
+        item = pending.pop()
+        if id(item) in seen or isinstance(item, shared):
+            continue
+        seen.add(id(item))
+        size += sys.getsizeof(item, 0)
+        pending.extend(gc.get_referents(item))
+    return size
+
+class RetainedInstance:
+    """
+    RetainedInstance
+
+    Keep single instance of object registered with _retain=<policy> or _retain_idle=<seconds>
+        weak      : instance is held by weak reference, created again once it is garbage collected
+        evictable : instance can be evicted by container.memory_budget when idle or over the budget
+
+        container.register(Model, DependencyConfig("model.path"), _retain="evictable", _retain_idle=3600)
+
+    Evicted instance is not disposed, object depending on it keep its reference
+    """
+    # Idle time source, replaceable in test
+    _clock = staticmethod(time.monotonic)
+
+    def __init__(self, factory, weak=False, idle_timeout=None):
+        self.factory = factory
+        self.weak = weak
+        self.idle_timeout = idle_timeout
+        # Approximate size measured by MemoryBudget when instance is created
+        self.size = None
+        self.last_used = None
+        self.__instance = None
+        self.__pending = None
+        self.__future = None
+        self.__counters = {"misses": 0, "evictions": 0}
+        self.__lock = threading.Lock()
+
+    @property
+    def policy(self):
+        return "weak" if self.weak else "evictable"
+
+    def __get(self):
+        instance = self.__instance
+        if instance is not None and self.weak:
+            instance = instance()
+        return instance
+
+    def __store(self, instance):
+        if self.weak:
+            try:
+                instance = weakref.ref(instance, self.__collected)
+            except TypeError:
+                raise Exception("{} instance can not be weak referenced".format(self.factory.path))
+
+        with self.__lock:
+            self.__instance = instance
+            self.last_used = self._clock()
+            self.__counters["misses"] += 1
+
+        budget = self.factory.memory_budget
+        if budget is not None:
+            budget._track(self, self.__get())
+            # Measuring size is not idle time
+            self.last_used = self._clock()
+
+    def __collected(self, ref):
+        # Called by garbage collector at any point, lock may be held by the same thread
+        if self.__instance is ref:
+            self.__instance = None
+            budget = self.factory.memory_budget
+            if budget is not None:
+                budget._untrack(self)
+
+    def instance(self, create, args=(), kwargs=None):
+        instance = self.__get()
+        if instance is not None:
+            self.last_used = self._clock()
+            return instance
+
+        with self.__lock:
+            instance = self.__get()
+            if instance is not None:
+                self.last_used = self._clock()
+                return instance
+
+            pending = self.__pending
+            owner = pending is None
+            if owner:
+                pending = self.__pending = (concurrent.futures.Future(), threading.get_ident())
+            elif pending[1] == threading.get_ident():
+                raise Exception("Circular dependency detected while creating retained instance {}".format(
+                    self.factory.path))
+
+        future = pending[0]
+        if not owner:
+            # Other thread is creating the instance
+            return future.result()
+
+        try:
+            instance = create(*args, **(kwargs or {}))
+            self.__store(instance)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self.__lock:
+                self.__pending = None
+        future.set_result(instance)
+        return instance
+
+    async def ainstance(self, create, args=(), kwargs=None):
+        instance = self.__get()
+        if instance is not None:
+            self.last_used = self._clock()
+            return instance
+
+        with self.__lock:
+            future = self.__future
+            if future is None:
+                future = self.__future = asyncio.ensure_future(create(*args, **(kwargs or {})))
+                future.add_done_callback(self.__set_future_instance)
+
+        instance = await asyncio.shield(future)
+        if self.weak:
+            # Weak reference is created when the awaited creation finish
+            self.__get() or self.__store(instance)
+        return instance
+
+    def __set_future_instance(self, future):
+        self.__future = None
+        if not future.cancelled() and future.exception() is None and not self.weak:
+            self.__store(future.result())
+
+    def idle(self):
+        """
+        Return seconds since instance was last used, None when there is no instance
+        """
+        if self.__get() is None:
+            return None
+        return self._clock() - self.last_used
+
+    def expired(self):
+        idle = self.idle()
+        return self.idle_timeout is not None and idle is not None and idle >= self.idle_timeout
+
+    def evict(self):
+        """
+        Drop kept instance without disposing it, return True when an instance was kept
+        """
+        with self.__lock:
+            evicted = self.__get() is not None
+            self.__instance = None
+            if evicted:
+                self.__counters["evictions"] += 1
+        budget = self.factory.memory_budget
+        if budget is not None:
+            budget._untrack(self)
+        return evicted
+
+    def _pop_all(self):
+        with self.__lock:
+            instance = self.__get()
+            self.__instance = None
+        budget = self.factory.memory_budget
+        if budget is not None:
+            budget._untrack(self)
+        return [] if instance is None else [instance]
+
+    def _after_fork(self, clear=False):
+        # Pending creation belong to thread of the parent process
+        self.__lock = threading.Lock()
+        self.__pending = None
+        self.__future = None
+        if clear:
+            self.__instance = None
+
+    def stats(self):
+        """
+        Return { size, bytes, idle, misses, evictions }, size is 1 when instance is kept
+        """
+        idle = self.idle()
+        return dict(size=0 if idle is None else 1, bytes=None if idle is None else self.size, idle=idle,
+                    **self.__counters)
+
+class MemoryBudget:
+    """
+    MemoryBudget
+
+    Track instance of object registered with _retain or _retain_idle, retrieve using container.memory_budget
+    Approximate retained size is measured once when the instance is created
+
+        container.memory_budget.limit(512 * 1024 * 1024)  => evict least recently used instance over the limit
+        container.memory_budget.evict()                   => evict idle instance and instance over the limit
+        container.memory_budget.report()                  => { object path : { bytes, idle, retain } }
+
+    Limit is checked when retained instance is created, idle instance is only evicted by evict()
+    Weak referenced instance is reported but not counted, it is released by the garbage collector
+    """
+    def __init__(self):
+        self.max_bytes = None
+        # RetainedInstance with a kept instance, in creation order
+        self.__retained = {}
+        self.__lock = threading.Lock()
+
+    def limit(self, max_bytes):
+        """
+        Set memory budget in bytes, None to disable. Return evicted object path
+        """
+        self.max_bytes = max_bytes
+        return self.evict()
+
+    def _track(self, retained, instance):
+        retained.size = _retained_size(instance)
+        with self.__lock:
+            self.__retained[retained] = None
+        if self.max_bytes is not None:
+            self.evict(keep=retained)
+
+    def _untrack(self, retained):
+        # Lock free, called from garbage collector callback
+        self.__retained.pop(retained, None)
+
+    def _after_fork(self):
+        self.__lock = threading.Lock()
+
+    def total(self):
+        """
+        Approximate bytes of evictable instance
+        """
+        with self.__lock:
+            retained = list(self.__retained)
+        return sum(item.size or 0 for item in retained if not item.weak)
+
+    def evict(self, keep=None):
+        """
+        Evict instance idle longer than its _retain_idle, then least recently used instance until
+        total size is under the limit. Return list of evicted object path
+        """
+        with self.__lock:
+            retained = [item for item in self.__retained if not item.weak]
+
+        evicted = [item for item in retained if item.expired() and item.evict()]
+
+        if self.max_bytes is not None:
+            remaining = [item for item in retained if item not in evicted]
+            total = sum(item.size or 0 for item in remaining)
+            for item in sorted(remaining, key=lambda item: item.last_used):
+                if total <= self.max_bytes:
+                    break
+                if item is not keep and item.evict():
+                    total -= item.size or 0
+                    evicted.append(item)
+
+        return [item.factory.path for item in evicted]
+
+    def report(self):
+        """
+        Return { object path : { bytes, idle, retain } } of kept instance, largest first
+        """
+        with self.__lock:
+            retained = list(self.__retained)
+
+        rows = [(item.factory.path, {"bytes": item.size, "idle": item.idle(), "retain": item.policy})
+                for item in retained]
+        rows.sort(key=lambda row: row[1]["bytes"] or 0, reverse=True)
+        return dict(rows)
+
+class CallbackCache:
+    """
+    CallbackCache
+
+    Keep result of DependencyCallback registered with _memoize=True, retrieve using container.callback_cache
+    Each container keep its own result, isolated overlay and updated container call the callback again
+
+        container.callback_cache.invalidate()            => drop every memoized result of this container
+        container.callback_cache.invalidate(dependency)  => drop result of one DependencyCallback
+    """
+    def __init__(self):
+        self.__caches = {}
+        self.__lock = threading.Lock()
+
+    def cache(self, dependency, ttl=None):
+        """
+        Return InstanceCache holding dependency result
+        """
+        cache = self.__caches.get(dependency)
+        if cache is None:
+            with self.__lock:
+                cache = self.__caches.get(dependency)
+                if cache is None:
+                    cache = self.__caches[dependency] = InstanceCache(1, ttl)
+        return cache
+
+    def invalidate(self, dependency=None):
+        """
+        Drop memoized result, return number of dropped result
+        """
+        with self.__lock:
+            caches = list(self.__caches.values()) if dependency is None else [self.__caches.get(dependency)]
+        return len([cache for cache in caches if cache is not None and cache.invalidate()])
+
+    def _after_fork(self):
+        self.__lock = threading.Lock()
+        for cache in self.__caches.values():
+            cache._after_fork()
+
+class ConfigCache:
+    """
+    ConfigCache
+
+    Cache DependencyConfig value by ( config path, placeholder, value format ), retrieve using container.config_cache
+    Disabled by default, value is read from config object on every build
+
+        container.config_cache.enable()
+        container.config_cache.invalidate(reload=callback) => new version
+
+    Invalidate swap the whole cache at once, build running during reload still read previous value
+    """
+    def __init__(self):
+        self.enabled = False
+        self.__values = {}
+        self.__version = 0
+        self.__lock = threading.Lock()
+
+    @property
+    def version(self):
+        return self.__version
+
+    def enable(self, enabled=True):
+        self.enabled = enabled
+        if not enabled:
+            self.invalidate()
+
+    def values(self):
+        """
+        Current cache generation, value stored after invalidate() only affect the discarded generation
+        """
+        return self.__values
+
+    def _after_fork(self):
+        self.__lock = threading.Lock()
+
+    def invalidate(self, reload=None):
+        """
+        Drop all cached value and bump version
+        reload() is called before new generation is visible, e.g. to re read config file
+        """
+        with self.__lock:
+            if reload is not None:
+                reload()
+            self.__values = {}
+            self.__version += 1
+            return self.__version
+
+class Instrumentation:
+    """
+    Instrumentation
+
+    Observe object creation of a container, retrieve using container.instrumentation
+    Nothing is measured until a hook is added, stats is enabled or a trace is running
+
+        pre(factory)                                  : called before object is created
+        post(factory, instance, seconds, exception)   : called after object is created or failed
+
+        instrumentation.add_hook(pre=pre, post=post)
+        instrumentation.enable_stats()
+
+        with instrumentation.trace() as tree:
+            container.my_project.MyClass.build()
+
+        instrumentation.export() => list of stats per object path, slowest first
+    """
+    def __init__(self):
+        self.__pre_hooks = ()
+        self.__post_hooks = ()
+        self.__stats = None
+        self.__tracing = 0
+        self.__lock = threading.Lock()
+        self.active = False
+
+    def __update_active(self):
+        self.active = bool(len(self.__pre_hooks) or len(self.__post_hooks)
+                           or self.__stats is not None or self.__tracing)
+
+    def add_hook(self, pre=None, post=None):
+        with self.__lock:
+            if pre is not None:
+                self.__pre_hooks += (pre,)
+            if post is not None:
+                self.__post_hooks += (post,)
+            self.__update_active()
+
+    def remove_hook(self, pre=None, post=None):
+        with self.__lock:
+            self.__pre_hooks = tuple(hook for hook in self.__pre_hooks if hook is not pre)
+            self.__post_hooks = tuple(hook for hook in self.__post_hooks if hook is not post)
+            self.__update_active()
+
+    def enable_stats(self, enabled=True):
+        with self.__lock:
+            if not enabled:
+                self.__stats = None
+            elif self.__stats is None:
+                self.__stats = {}
+            self.__update_active()
+
+    def _after_fork(self):
+        self.__lock = threading.Lock()
+
+    def reset_stats(self):
+        with self.__lock:
+            if self.__stats is not None:
+                self.__stats = {}
+
+    def stats(self):
+        """
+        Return { object path : { count, errors, total, mean, max } }, time in seconds
+        """
+        with self.__lock:
+            stats = dict(self.__stats or {})
+
+        return dict((path, {
+            "count": count,
+            "errors": errors,
+            "total": total,
+            "mean": total / count if count else 0,
+            "max": maximum
+        }) for path, (count, errors, total, maximum) in stats.items())
+
+    def export(self, file=None):
+        """
+        Return aggregated stats as list sorted by total time, write as JSON when file is given
+        """
+        rows = [dict(path=path, **stats) for path, stats in self.stats().items()]
+        rows.sort(key=lambda row: row["total"], reverse=True)
+
+        if file is not None:
+            json.dump(rows, file, indent=2)
+        return rows
+
+    @contextlib.contextmanager
+    def trace(self):
+        """
+        Record dependency tree of every object created in this context
+        Each node is { path, seconds, error, children }
+        """
+        root = {"path": None, "seconds": None, "error": None, "children": []}
+
+        with self.__lock:
+            self.__tracing += 1
+            self.__update_active()
+
+        token = _TRACE.set(root)
+        try:
+            yield root
+        finally:
+            _TRACE.reset(token)
+            with self.__lock:
+                self.__tracing -= 1
+                self.__update_active()
+
+    def __before(self, factory):
+        for hook in self.__pre_hooks:
+            hook(factory)
+
+        parent = _TRACE.get()
+        if parent is None:
+            return None, None
+
+        node = {"path": factory.path, "seconds": None, "error": None, "children": []}
+        parent["children"].append(node)
+        return node, _TRACE.set(node)
+
+    def __after(self, factory, node, token, instance, seconds, error):
+        if node is not None:
+            node["seconds"] = seconds
+            node["error"] = None if error is None else repr(error)
+            _TRACE.reset(token)
+
+        if self.__stats is not None:
+            with self.__lock:
+                stats = self.__stats.get(factory.path, (0, 0, 0.0, 0.0))
+                self.__stats[factory.path] = (stats[0] + 1, stats[1] + (error is not None),
+                                              stats[2] + seconds, max(stats[3], seconds))
+
+        for hook in self.__post_hooks:
+            hook(factory, instance, seconds, error)
+
+    def observe(self, factory, create, *args, **kwargs):
+        node, token = self.__before(factory)
+        instance = error = None
+        start = time.perf_counter()
+        try:
+            instance = create(*args, **kwargs)
+            return instance
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self.__after(factory, node, token, instance, time.perf_counter() - start, error)
+
+    async def aobserve(self, factory, create, *args, **kwargs):
+        node, token = self.__before(factory)
+        instance = error = None
+        start = time.perf_counter()
+        try:
+            instance = await create(*args, **kwargs)
+            return instance
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self.__after(factory, node, token, instance, time.perf_counter() - start, error)
 
 class ObjectFactory:
     """
@@ -64,6 +1468,17 @@ class ObjectFactory:
         _group  : For object grouping, retrieve using DependencyGroup during container registration
         _alias  : For object aliasing
         _config : To set object as config, will be pass to DependencyConfig
+        _scope  : Scope name, single instance is kept per active Scope instead of globally
+                  "graph" scope share one instance within a single top level instance() or build() call
+        _pool   : Maximum pool size, instance is checked out from a bounded pool instead of being a singleton
+                  _pool_timeout and _pool_idle set exhausted pool wait and idle eviction in seconds
+        _cache  : Maximum cached instance, instance() keep one instance per arguments instead of a single instance
+                  least recently used is evicted, _cache_ttl set instance lifetime in seconds
+        _fork_safe : False to create instance again in forked child process, see Container.prefork()
+        _finalizer : Called with created instance on dispose() instead of close() or context manager exit
+        _retain    : "weak" or "evictable", see RetainedInstance. _retain_idle evict instance not used for given seconds
+        _autowire  : Resolve parameter not given as dependency from __init__ annotation
+                     annotated registered class use Dependency, Annotated[type, <dependency object>] use the dependency
 
     To get an instance:
         f.instance(*args, **kwargs) => Return single instance
@@ -72,24 +1487,368 @@ class ObjectFactory:
         f(build=True, *args, **kwargs) => same as f.build(*args, **kwargs)
         f(*args, **kwargs) => same as f.instance(*args, **kwargs)
 
+    Pooled object:
+        f.checkout(timeout) => Context manager returning pooled instance
+        f.instance() => Pooled instance checked out until the active scope end
+
     *args, **kwargs will be merge with dependency_args and dependency_kwargs is passed during class object creation
     """
-    def __init__(self, class_object, containers, *args, **kwargs):
+    __slots__ = ("__class_object", "__containers", "__scope", "__dependency_args", "__dependency_kwargs",
+                 "__instance", "__plan", "__lock", "__owner", "__future", "__instrument", "__lifetime",
+                 "__fork_safe", "__finalizer", "__autowire")
+    _logger = logging.getLogger("easydi.ObjectFactory")
+
+    def __init__(self, class_object, containers, *args, _scope=None, _pool=None, _pool_timeout=None,
+                 _pool_idle=None, _cache=None, _cache_ttl=None, _fork_safe=True, _finalizer=None,
+                 _retain=None, _retain_idle=None, _autowire=False, **kwargs):
+        # Import string is replaced with class object on first use
         self.__class_object = class_object
         self.__containers = containers
+        self.__instrument = dict.get(containers, "_instrument")
+        self.__scope = _scope
         self.__dependency_args = args
-        self.__dependency_kwargs = kwargs
+        self.__dependency_kwargs = kwargs or _EMPTY_KWARGS
         self.__instance = None
-        self._logger = logging.getLogger("easydi.{}".format(self.__class__.__name__))
+        self.__plan = None
+        # Created on first instance(), most registered object is never instantiated
+        self.__lock = None
+        self.__owner = None
+        self.__future = None
+        # Pool or keyed cache, both can not be used together
+        self.__lifetime = None
+        self.__fork_safe = _fork_safe
+        self.__finalizer = _finalizer
+        # Annotation is read on first use, dependency may be registered later
+        self.__autowire = _autowire
+
+        if _pool is not None:
+            if _scope == _GRAPH_SCOPE:
+                raise Exception("Pooled object can not be {} scoped".format(_GRAPH_SCOPE))
+            self.__lifetime = ObjectPool(self.__create_instance, _pool, _pool_timeout, _pool_idle, self.__finalize)
+
+        if _cache is not None:
+            if _scope is not None or _pool is not None:
+                raise Exception("Cached object can not be scoped or pooled")
+            self.__lifetime = InstanceCache(_cache, _cache_ttl)
+
+        if _retain is not None or _retain_idle is not None:
+            if _scope is not None or _pool is not None or _cache is not None:
+                raise Exception("Retained object can not be scoped, pooled or cached")
+            if _retain not in (None, "weak", "evictable"):
+                raise Exception("Retain policy must be weak or evictable")
+            if _retain == "weak" and _retain_idle is not None:
+                raise Exception("Weak retained object is released by garbage collector, _retain_idle is not used")
+            self.__lifetime = RetainedInstance(self, _retain == "weak", _retain_idle)
 
     @property
     def name(self):
-        return self.__class_object.__qualname__
+        return _retrieve_class_path(self.__class_object)[-1]
+
+    @property
+    def class_object(self):
+        class_object = self.__class_object
+        if isinstance(class_object, str):
+            class_object = self.__import_class()
+        return class_object
+
+    def __import_class(self):
+        with _FACTORY_LOCK:
+            if not isinstance(self.__class_object, str):
+                return self.__class_object
+
+            module_name, qualname = _split_import_path(self.__class_object)
+            path = self.path
+            start = time.perf_counter()
+            try:
+                obj = importlib.import_module(module_name)
+                for attr in qualname.split("."):
+                    obj = getattr(obj, attr)
+            except:
+                self._logger.debug(sys.exc_info())
+                raise Exception("Unable to import {}".format(self.__class_object))
+
+            record = dict.get(self.__containers, "_deferred", {}).get(path)
+            if record is not None:
+                record["seconds"] = time.perf_counter() - start
+
+            try:
+                self.__containers["_index"][obj] = self
+            except TypeError:
+                # Frozen index, lookup by class fall back to path
+                pass
+
+            self.__class_object = obj
+            return obj
+
+    @property
+    def path(self):
+        return ".".join(_retrieve_class_path(self.__class_object))
+
+    @property
+    def scope(self):
+        return self.__scope
+
+    @property
+    def pool(self):
+        lifetime = self.__lifetime
+        return lifetime if type(lifetime) is ObjectPool else None
+
+    @property
+    def cache(self):
+        lifetime = self.__lifetime
+        return lifetime if type(lifetime) is InstanceCache else None
+
+    @property
+    def retention(self):
+        lifetime = self.__lifetime
+        return lifetime if type(lifetime) is RetainedInstance else None
+
+    @property
+    def memory_budget(self):
+        return dict.get(self.__containers, "_memory_budget")
+
+    @property
+    def singleton(self):
+        """
+        Single instance is kept by this factory, not by a scope, a pool or a keyed cache
+        """
+        return self.__scope is None and self.__lifetime is None
+
+    @property
+    def fork_safe(self):
+        return self.__fork_safe
+
+    @property
+    def compiled(self):
+        return self.__plan is not None
 
     def update_containers(self, containers):
         self.__containers = containers
+        self.__instrument = dict.get(containers, "_instrument")
+        self.__plan = None
+
+    def clone(self, containers):
+        """
+        Return new ObjectFactory with the same dependency, bound to other containers
+        """
+        options = {"_scope": self.__scope, "_fork_safe": self.__fork_safe, "_finalizer": self.__finalizer,
+                   "_autowire": self.__autowire}
+        pool, cache, retention = self.pool, self.cache, self.retention
+        if pool is not None:
+            options.update(_pool=pool.max_size, _pool_timeout=pool.timeout, _pool_idle=pool.idle_timeout)
+        if cache is not None:
+            options.update(_cache=cache.max_size, _cache_ttl=cache.ttl)
+        if retention is not None:
+            options.update(_retain=retention.policy, _retain_idle=retention.idle_timeout)
+
+        return ObjectFactory(self.__class_object, containers, *self.__dependency_args,
+                             **options, **self.__dependency_kwargs)
+
+    @property
+    def deferred(self):
+        """
+        Registered by import string and not imported yet
+        """
+        return isinstance(self.__class_object, str)
+
+    def __autowire_dependencies(self):
+        """
+        Merge autowired parameter to keyword dependency, parameter given during registration is kept
+        """
+        plan = _autowire_plan(self.class_object)
+        kwargs = dict(self.__dependency_kwargs)
+
+        for index, (name, target, has_default) in enumerate(plan):
+            if index < len(self.__dependency_args) or name in kwargs:
+                continue
+
+            if isinstance(target, _DEPENDENCY_TYPES):
+                kwargs[name] = target
+            elif target is not None and _lookup_factory(self.__containers, target) is not None:
+                kwargs[name] = Dependency(target)
+            elif not has_default:
+                raise Exception("Unable to autowire {} parameter {}".format(self.path, name))
+
+        self.__dependency_kwargs = kwargs or _EMPTY_KWARGS
+        self.__autowire = False
+
+    def validate(self):
+        """
+        Return list of error message of this object dependency
+        """
+        errors = []
+        if self.__autowire:
+            try:
+                self.__autowire_dependencies()
+            except Exception as e:
+                return ["{} : {}".format(self.path, e)]
+
+        for arg in self.__dependency_args + tuple(self.__dependency_kwargs.values()):
+            errors += ["{} : {}".format(self.path, error) for error in arg.validate(self.__containers)]
+        return errors
+
+    def dependencies(self):
+        """
+        Return registered ObjectFactory this object depend on
+        """
+        if self.__autowire:
+            try:
+                self.__autowire_dependencies()
+            except Exception:
+                # Reported by validate(), raised on creation
+                pass
+
+        objs = []
+        for arg in self.__dependency_args + tuple(self.__dependency_kwargs.values()):
+            for obj in arg.factories(self.__containers):
+                if obj not in objs:
+                    objs.append(obj)
+        return objs
+
+    def _compile(self):
+        """
+        Compile dependency tree to flat resolution plan
+        Singleton dependency are created and bound to the plan, transient dependency are inline
+        Called by Container.compile(), container discard the plan when it is modified
+        """
+        plan = []
+        self._compile_into(plan, [])
+        self.__plan = plan
+        return self
+
+    def reset_plan(self):
+        self.__plan = None
+
+    @property
+    def created(self):
+        """
+        Instance is kept by this factory and must be disposed
+        """
+        return (self.__instance is not None
+                or (self.__lifetime is not None and self.__lifetime.stats()["size"] > 0))
+
+    def dispose(self):
+        """
+        Dispose instance kept by this factory ( singleton, keyed cache and idle pooled instance )
+        using _finalizer, close() or context manager exit. Singleton is created again on next use
+        """
+        error = None
+        for instance in self.__pop_instances():
+            try:
+                self.__finalize(instance)
+            except Exception as e:
+                error = error or e
+        if error is not None:
+            raise error
+
+    async def adispose(self):
+        """
+        Async version of dispose(), support async finalizer, aclose() and async context manager exit
+        Synchronous finalizer and close() run in executor, they can be timed out without blocking the event loop
+        """
+        error = None
+        for instance in self.__pop_instances():
+            try:
+                if self.__finalizer is None:
+                    await _adispose(instance, in_thread=True)
+                elif inspect.iscoroutinefunction(self.__finalizer):
+                    await self.__finalizer(instance)
+                else:
+                    context = contextvars.copy_context()
+                    result = await asyncio.get_running_loop().run_in_executor(
+                        None, context.run, self.__finalizer, instance)
+                    if inspect.isawaitable(result):
+                        await result
+            except Exception as e:
+                error = error or e
+        if error is not None:
+            raise error
+
+    def __pop_instances(self):
+        instances = []
+        if self.__instance is not None:
+            instances.append(self.__instance)
+            self.__instance = None
+        if self.cache is not None or self.retention is not None:
+            instances += self.__lifetime._pop_all()
+        if self.pool is not None:
+            # Idle instance is disposed now, instance in use when returned. Pool stay usable
+            self.__lifetime.clear()
+        return instances
+
+    def __finalize(self, instance):
+        if self.__finalizer is not None:
+            return self.__finalizer(instance)
+        return _dispose(instance)
+
+    def _after_fork(self, drop=None):
+        """
+        Called in forked child, lock and in flight creation belong to the parent process
+        Fork unsafe instance is dropped and created again on next use
+
+        drop : drop instance even when registered fork safe, e.g. it depends on fork unsafe object
+        """
+        if drop is None:
+            drop = not self.__fork_safe
+        self.__lock = None
+        self.__owner = None
+        self.__future = None
+        if drop:
+            self.__instance = None
+        if self.pool is not None:
+            self.__lifetime._after_fork(drop=drop)
+        if self.cache is not None or self.retention is not None:
+            self.__lifetime._after_fork(clear=drop)
+
+    def _compile_into(self, plan, stack, args=(), kwargs=None):
+        """
+        Append resolution step of this factory to plan and return its source
+        """
+        if self in stack:
+            raise Exception("Circular dependency {}".format(
+                " -> ".join([obj.name for obj in stack + [self]])))
+
+        if self.__autowire:
+            self.__autowire_dependencies()
+
+        # Graph scoped dependency is shared on each run, can not be inline
+        if self.__scope == _GRAPH_SCOPE and len(stack):
+            plan.append((self.build, tuple((False, arg) for arg in args),
+                         tuple((key, False, val) for key, val in (kwargs or {}).items()), None))
+            return (True, len(plan) - 1)
+
+        stack.append(self)
+        arg_sources = tuple(arg.compile(self.__containers, plan, stack) for arg in self.__dependency_args)
+        arg_sources += tuple((False, arg) for arg in args)
+
+        kwarg_sources = tuple((key,) + val.compile(self.__containers, plan, stack)
+                              for key, val in self.__dependency_kwargs.items())
+        kwarg_sources += tuple((key, False, val) for key, val in (kwargs or {}).items())
+        stack.pop()
+
+        plan.append((self.class_object, arg_sources, kwarg_sources, self.__class_object))
+        return (True, len(plan) - 1)
 
     def __create_instance(self, *args, **kwargs):
+        if _GRAPH.get() is None and _map_get(self.__containers, "_graph"):
+            # Top level resolution, graph scoped instance live until it return
+            token = _GRAPH.set({})
+            try:
+                return self.__create_instance(*args, **kwargs)
+            finally:
+                _GRAPH.reset(token)
+
+        instrument = self.__instrument
+        if instrument is not None and instrument.active:
+            return instrument.observe(self, self.__construct, *args, **kwargs)
+
+        if self.__plan is not None:
+            return _run_plan(self.__plan, args, kwargs)
+        return self.__construct(*args, **kwargs)
+
+    def __construct(self, *args, **kwargs):
+        if self.__autowire:
+            self.__autowire_dependencies()
 
         dependency_args = [arg.build(self.__containers)
                            for arg in self.__dependency_args]
@@ -99,24 +1858,214 @@ class ObjectFactory:
         dependency_args = tuple(dependency_args) + tuple(args)
         dependency_kwargs.update(kwargs)
         try:
-            return self.__class_object(*dependency_args, **dependency_kwargs)
-        except:
-            self._logger.debug("{} {}".format(self.__class_object, sys.exc_info()))
+            return self.class_object(*dependency_args, **dependency_kwargs)
+        except Exception as e:
+            self._logger.debug("%s %s", self.__class_object, sys.exc_info())
             raise Exception("Unable to create {} instance.".format(
-                self.__class_object))
+                self.__class_object)) from e
 
     def instance(self, *args, **kwargs):
-        if self.__instance is None:
-            instance = self.__create_instance(*args, **kwargs)
-            self.__instance = instance
-        return self.__instance
+        if self.__scope == _GRAPH_SCOPE:
+            return self.__graph_instance(*args, **kwargs)
+
+        lifetime = self.__lifetime
+        if lifetime is not None:
+            if type(lifetime) is ObjectPool:
+                return self.__pool_scope().checkout(self, lifetime)
+            return lifetime.instance(self.__create_instance, args, kwargs)
+
+        if self.__scope is not None:
+            return self.__active_scope().instance(self, self.__create_instance, *args, **kwargs)
+
+        instance = self.__instance
+        if instance is not None:
+            return instance
+
+        # Same thread coming back while creating, waiting for the lock will deadlock
+        if self.__owner == threading.get_ident():
+            raise self.__circular_error()
+
+        if self.__lock is None:
+            with _FACTORY_LOCK:
+                if self.__lock is None:
+                    self.__lock = threading.Lock()
+
+        with self.__lock:
+            if self.__instance is None:
+                self.__owner = threading.get_ident()
+                try:
+                    self.__instance = self.__create_instance(*args, **kwargs)
+                finally:
+                    self.__owner = None
+            return self.__instance
 
     def build(self, *args, **kwargs):
+        if self.__scope == _GRAPH_SCOPE:
+            return self.__graph_instance(*args, **kwargs)
         return self.__create_instance(*args, **kwargs)
 
+    def __graph_instance(self, *args, **kwargs):
+        graph = _GRAPH.get()
+        if graph is None:
+            return self.__create_instance(*args, **kwargs)
+
+        # Entry is ( future, creating thread ), creation is shared by every thread of the graph
+        pending = graph.get(self)
+        if pending is not None and pending[0].done():
+            return pending[0].result()
+
+        with _GRAPH_LOCK:
+            pending = graph.get(self)
+            owner = pending is None
+            if owner:
+                pending = graph[self] = (concurrent.futures.Future(), threading.get_ident())
+
+        future = pending[0]
+        if not owner:
+            if pending[1] == threading.get_ident() and not future.done():
+                raise self.__circular_error()
+            return future.result()
+
+        try:
+            instance = self.__create_instance(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        future.set_result(instance)
+        return instance
+
+    def __circular_error(self):
+        return Exception("Circular dependency detected while creating {} instance.".format(self.__class_object))
+
+    def __active_scope(self):
+        scope = _find_scope(self.__scope)
+        if scope is None:
+            raise Exception("{} require an active {} scope.".format(self.__class_object, self.__scope))
+        return scope
+
+    def __pool_scope(self):
+        if self.__scope is not None:
+            return self.__active_scope()
+
+        scope = _SCOPE.get()
+        if scope is None:
+            raise Exception("{} is pooled, use checkout() or resolve it inside a scope.".format(
+                self.__class_object))
+        return scope
+
+    def checkout(self, timeout=_MISSING):
+        """
+        Context manager returning pooled instance, instance is returned to the pool on exit
+        """
+        if self.pool is None:
+            raise Exception("{} is not pooled, register it with _pool=<max size>".format(self.__class_object))
+        return self.__lifetime.checkout(timeout)
+
+    async def __acreate_instance(self, *args, **kwargs):
+        if _GRAPH.get() is None and _map_get(self.__containers, "_graph"):
+            token = _GRAPH.set({})
+            try:
+                return await self.__acreate_instance(*args, **kwargs)
+            finally:
+                _GRAPH.reset(token)
+
+        instrument = self.__instrument
+        if instrument is not None and instrument.active:
+            return await instrument.aobserve(self, self.__aconstruct, *args, **kwargs)
+        return await self.__aconstruct(*args, **kwargs)
+
+    async def __aconstruct(self, *args, **kwargs):
+        if self.__autowire:
+            self.__autowire_dependencies()
+        keys = list(self.__dependency_kwargs.keys())
+
+        creating = _ACREATING.get()
+        if self in creating:
+            raise self.__circular_error()
+
+        # Dependency task copy this context, waiting for own in flight creation is detected
+        token = _ACREATING.set(creating + (self,))
+        try:
+            # Independent dependency are resolved concurrently
+            values = await asyncio.gather(
+                *[arg.abuild(self.__containers) for arg in self.__dependency_args],
+                *[self.__dependency_kwargs[key].abuild(self.__containers) for key in keys])
+        finally:
+            _ACREATING.reset(token)
+
+        dependency_args = tuple(values[:len(self.__dependency_args)]) + tuple(args)
+        dependency_kwargs = dict(zip(keys, values[len(self.__dependency_args):]))
+        dependency_kwargs.update(kwargs)
+        try:
+            instance = self.class_object(*dependency_args, **dependency_kwargs)
+            if inspect.isawaitable(instance):
+                instance = await instance
+            return instance
+        except Exception as e:
+            self._logger.debug("%s %s", self.__class_object, sys.exc_info())
+            raise Exception("Unable to create {} instance.".format(
+                self.__class_object)) from e
+
+    async def ainstance(self, *args, **kwargs):
+        """
+        Async version of instance(), support async factory function and async dependency
+        Concurrent awaiter share the same in flight creation
+        """
+        if self in _ACREATING.get():
+            raise self.__circular_error()
+
+        if self.__scope == _GRAPH_SCOPE:
+            return await self.__agraph_instance(*args, **kwargs)
+
+        lifetime = self.__lifetime
+        if lifetime is not None:
+            if type(lifetime) is ObjectPool:
+                return await self.__pool_scope().acheckout(self, lifetime)
+            return await lifetime.ainstance(self.__acreate_instance, args, kwargs)
+
+        if self.__scope is not None:
+            return await self.__active_scope().ainstance(self, self.__acreate_instance, *args, **kwargs)
+
+        instance = self.__instance
+        if instance is not None:
+            return instance
+
+        future = self.__future
+        if future is None:
+            future = asyncio.ensure_future(self.__acreate_instance(*args, **kwargs))
+            future.add_done_callback(self.__set_future_instance)
+            self.__future = future
+
+        # Cancelling one awaiter must not cancel creation for the others
+        return await asyncio.shield(future)
+
+    def __set_future_instance(self, future):
+        self.__future = None
+        if not future.cancelled() and future.exception() is None:
+            self.__instance = future.result()
+
+    async def abuild(self, *args, **kwargs):
+        """
+        Async version of build()
+        """
+        if self.__scope == _GRAPH_SCOPE:
+            return await self.__agraph_instance(*args, **kwargs)
+        return await self.__acreate_instance(*args, **kwargs)
+
+    async def __agraph_instance(self, *args, **kwargs):
+        graph = _GRAPH.get()
+        if graph is None:
+            return await self.__acreate_instance(*args, **kwargs)
+
+        # Dependency are resolved concurrently, share the in flight creation
+        future = graph.get(self)
+        if future is None:
+            future = graph[self] = asyncio.ensure_future(self.__acreate_instance(*args, **kwargs))
+        return await future
+
     def __call__(self, _build=False, *args, **kwargs):
         if _build is True:
-            self._logger.debug([self.name, "Build"])
+            self._logger.debug("%s Build", self.name)
             return self.build(*args, **kwargs)
         else:
             return self.instance(*args, **kwargs)
@@ -129,75 +2078,131 @@ class Dependency:
     Default Dependency Object, return instance, list, dict or tuple
     """
 
+    __slots__ = ("__class", "__single_instance", "__dependency_args", "__dependency_kwargs")
+    _logger = logging.getLogger("easydi.Dependency")
+
     def __init__(self, _class, _single_instance=True, *args, **kwargs):
         self.__class = _class
         self.__single_instance = _single_instance
         self.__dependency_args = args
-        self.__dependency_kwargs = kwargs
-        self._logger = logging.getLogger("easydi.{}".format(self.__class__.__name__))
+        self.__dependency_kwargs = kwargs or _EMPTY_KWARGS
 
-    def build(self, containers):
-        obj = None
+    def factories(self, containers):
+        """
+        Return registered ObjectFactory required by this dependency
+        """
+        if not _is_factory_object(self.__class):
+            return []
 
-        if inspect.isclass(self.__class):
-            try:
-                class_path = _retrieve_class_path(self.__class)
-                for path in class_path:
-                    if isinstance(obj, ObjectFactoryMap):
-                        obj = getattr(obj, path)
-                    else:
-                        obj = getattr(containers, path)
+        obj = _lookup_factory(containers, self.__class)
+        return [] if obj is None else [obj]
 
-                # Unregister dependency return normal class ( always new instance )
-                if obj is None:
-                    return self.__class(*self.__dependency_args, **self.__dependency_kwargs)
+    def build(self, containers):
+        if _is_factory_object(self.__class):
+            obj = _lookup_factory(containers, self.__class)
 
-                if self.__single_instance is False:
-                    return obj.build(*self.__dependency_args, **self.__dependency_kwargs)
-                return obj.instance(*self.__dependency_args, **self.__dependency_kwargs)
-            except:
-                self._logger.debug(sys.exc_info())
-                raise Exception(
-                    "Object {} is not register in containers".format(".".join(class_path)))
+            # Unregister dependency return normal class ( always new instance )
+            if obj is None:
+                return self.__create_unregistered()
+
+            # Creation error is raised by ObjectFactory as is
+            if self.__single_instance is False:
+                return obj.build(*self.__dependency_args, **self.__dependency_kwargs)
+            return obj.instance(*self.__dependency_args, **self.__dependency_kwargs)
         elif isinstance(self.__class, (list, dict, tuple, int, float)):
             # Tuple, List, Dict, etc
             return self.__class
 
         raise Exception("Unsupported object type")
 
+    def __create_unregistered(self):
+        try:
+            return self.__class(*self.__dependency_args, **self.__dependency_kwargs)
+        except Exception as e:
+            self._logger.debug(sys.exc_info())
+            raise Exception("Unable to create {} instance.".format(self.__class)) from e
+
+    async def abuild(self, containers):
+        if not _is_factory_object(self.__class):
+            return self.build(containers)
+
+        obj = _lookup_factory(containers, self.__class)
+
+        if obj is None:
+            result = self.__create_unregistered()
+            if inspect.isawaitable(result):
+                result = await result
+            return result
+
+        if self.__single_instance is False:
+            return await obj.abuild(*self.__dependency_args, **self.__dependency_kwargs)
+        return await obj.ainstance(*self.__dependency_args, **self.__dependency_kwargs)
+
+    def validate(self, containers):
+        if _is_factory_object(self.__class) or isinstance(self.__class, (list, dict, tuple, int, float)):
+            return []
+        return ["Unsupported object type {}".format(self.__class)]
+
+    def compile(self, containers, plan, stack):
+        if not _is_factory_object(self.__class):
+            return (False, self.build(containers))
+
+        obj = _lookup_factory(containers, self.__class)
+
+        if obj is None:
+            plan.append((self.__class, tuple((False, arg) for arg in self.__dependency_args),
+                         tuple((key, False, val) for key, val in self.__dependency_kwargs.items()), self.__class))
+            return (True, len(plan) - 1)
+
+        if self.__single_instance is False:
+            return obj._compile_into(plan, stack, self.__dependency_args, self.__dependency_kwargs)
+        return _compile_instance(obj, plan, self.__dependency_args, self.__dependency_kwargs)
+
 class DependencyPath:
+    __slots__ = ("__path", "__single_instance", "__dependency_args", "__dependency_kwargs")
+    _logger = logging.getLogger("easydi.DependencyPath")
+
     def __init__(self, _path, _single_instance=True, *args, **kwargs):
         self.__path = _path
         self.__single_instance = _single_instance
         self.__dependency_args = args
-        self.__dependency_kwargs = kwargs
-        self._logger = logging.getLogger("easydi.{}".format(self.__class__.__name__))
+        self.__dependency_kwargs = kwargs or _EMPTY_KWARGS
+
+    def factories(self, containers):
+        obj = _lookup_factory(containers, self.__path)
+        return [] if obj is None else [obj]
 
     def build(self, containers):
-        obj = None
+        obj = self.__lookup(containers)
 
-        try:
-            class_path = self.__path.split(".")
+        if self.__single_instance is False:
+            return obj.build(*self.__dependency_args, **self.__dependency_kwargs)
+        return obj.instance(*self.__dependency_args, **self.__dependency_kwargs)
 
-            for path in class_path:
-                if isinstance(obj, ObjectFactoryMap):
-                    obj = getattr(obj, path)
-                else:
-                    obj = getattr(containers, path)
+    async def abuild(self, containers):
+        obj = self.__lookup(containers)
 
-            # Unregister dependency return normal class ( always new instance )
-            if obj is None:
-                return self.__class(*self.__dependency_args, **self.__dependency_kwargs)
+        if self.__single_instance is False:
+            return await obj.abuild(*self.__dependency_args, **self.__dependency_kwargs)
+        return await obj.ainstance(*self.__dependency_args, **self.__dependency_kwargs)
 
-            if self.__single_instance is False:
-                return obj.build(*self.__dependency_args, **self.__dependency_kwargs)
-            return obj.instance(*self.__dependency_args, **self.__dependency_kwargs)
-        except:
-            self._logger.debug(sys.exc_info())
-            raise Exception(
-                "Object {} is not register in containers".format(".".join(class_path)))
+    def __lookup(self, containers):
+        obj = _lookup_factory(containers, self.__path)
+        if obj is None:
+            raise Exception("Object {} is not register in containers".format(self.__path))
+        return obj
 
-        raise Exception("Unsupported object type")
+    def validate(self, containers):
+        if _lookup_factory(containers, self.__path) is None:
+            return ["Object {} is not register in containers".format(self.__path)]
+        return []
+
+    def compile(self, containers, plan, stack):
+        obj = self.__lookup(containers)
+
+        if self.__single_instance is False:
+            return obj._compile_into(plan, stack, self.__dependency_args, self.__dependency_kwargs)
+        return _compile_instance(obj, plan, self.__dependency_args, self.__dependency_kwargs)
 
 class DependencyConfig:
     """
@@ -212,24 +2217,105 @@ class DependencyConfig:
         placeholder : default value when config is not found
         value_format : Config value return format in str, bool, int, float default to str
     """
+    __slots__ = ("__config_path", "__placeholder", "__value_format", "__cache_key", "__validated")
+    _logger = logging.getLogger("easydi.DependencyConfig")
+
     def __init__(self, config_path, placeholder=None, value_format=str):
         self.__config_path = config_path
         self.__placeholder = placeholder
         self.__value_format = value_format
-        self._logger = logging.getLogger("easydi.{}".format(self.__class__.__name__))
+        # Built when cache is first used, most registration never enable the cache
+        self.__cache_key = _MISSING
+        self.__validated = False
+
+    def factories(self, containers):
+        obj = containers["_config"]
+        return [] if obj is None else [obj]
 
     def build(self, containers):
+        values = self.__cached_values(containers)
+        if values is not None:
+            try:
+                return values[self.__cache_key]
+            except KeyError:
+                pass
+
         try:
             config_instance = containers["_config"].instance()
         except:
             raise Exception("Object for config not set, please register object with _config=True")
 
-        get_function = getattr(config_instance, "get", None)
-        if not callable(get_function):
-            raise Exception("Config must implement : def get(config_path, placeholder, value_format)")
+        value = self.__get(config_instance)
+        if values is not None:
+            values[self.__cache_key] = value
+        return value
+
+    def __cached_values(self, containers):
+        cache = dict.get(containers, "_config_cache")
+        if cache is None or not cache.enabled:
+            return None
+
+        if self.__cache_key is _MISSING:
+            key = (self.__config_path, self.__placeholder, self.__value_format)
+            try:
+                hash(key)
+            except TypeError:
+                # Unhashable placeholder, value is never cached
+                key = None
+            self.__cache_key = key
+
+        if self.__cache_key is None:
+            return None
+        return cache.values()
+
+    async def abuild(self, containers):
+        values = self.__cached_values(containers)
+        if values is not None:
+            try:
+                return values[self.__cache_key]
+            except KeyError:
+                pass
+
+        value = await self.__aload(containers)
+        if values is not None:
+            values[self.__cache_key] = value
+        return value
+
+    async def __aload(self, containers):
+        try:
+            config_instance = await containers["_config"].ainstance()
+        except Exception:
+            raise Exception("Object for config not set, please register object with _config=True")
+
+        value = self.__get(config_instance)
+        if inspect.isawaitable(value):
+            value = await value
+        return value
+
+    def validate(self, containers):
+        config = containers["_config"]
+        if config is None:
+            return ["Object for config not set, please register object with _config=True"]
+
+        if not config.deferred and inspect.isclass(config.class_object):
+            if not callable(getattr(config.class_object, "get", None)):
+                return ["Config must implement : def get(config_path, placeholder, value_format)"]
+            # Checked once by Container.validate(), skip on each build
+            self.__validated = True
+        return []
+
+    def __get(self, config_instance):
+        if not self.__validated:
+            get_function = getattr(config_instance, "get", None)
+            if not callable(get_function):
+                raise Exception("Config must implement : def get(config_path, placeholder, value_format)")
 
         return config_instance.get(self.__config_path, placeholder=self.__placeholder, value_format=self.__value_format)
 
+    def compile(self, containers, plan, stack):
+        plan.append((self.build, ((False, containers),), (), None))
+        return (True, len(plan) - 1)
+
 class DependencyCallback:
     """
     Dependency Callback
@@ -240,118 +2326,1076 @@ class DependencyCallback:
     Arguments:
         callback : callable function
         _single_instance : return new instance if False
+        _memoize : True to keep callback result, scope name to keep it until the active scope end
+        _memoize_ttl : seconds before kept callback result is computed again, require _memoize=True
         args: callback function arguments
         kwargs: callback function keyword arguments
+
+    Memoized callback is called once per container even when built concurrently, result is kept by
+    container.callback_cache. dependency.invalidate() drop kept result in every container
     """
-    def __init__(self, callback, _single_instance=True, *args, **kwargs):
+    __slots__ = ("__callback", "__single_instance", "__dependency_args", "__dependency_kwargs", "__memo",
+                 "__memo_ttl", "__memo_caches")
+    _logger = logging.getLogger("easydi.DependencyCallback")
+
+    def __init__(self, callback, _single_instance=True, *args, _memoize=False, _memoize_ttl=None, **kwargs):
         self.__callback = callback
         self.__single_instance = _single_instance
         self.__dependency_args = args
-        self.__dependency_kwargs = kwargs
-        self._logger = logging.getLogger("easydi.{}".format(self.__class__.__name__))
+        self.__dependency_kwargs = kwargs or _EMPTY_KWARGS
 
-    def build(self, containers):
+        # True for result kept by container, scope name for result kept by scope
+        if _memoize_ttl is not None and _memoize is not True:
+            raise Exception("Callback _memoize_ttl require _memoize=True")
+        self.__memo = _memoize or None
+        self.__memo_ttl = _memoize_ttl
+        # InstanceCache of every container this dependency is memoized in
+        self.__memo_caches = weakref.WeakSet() if _memoize is True else None
+
+    @property
+    def memoized(self):
+        return self.__memo is not None
+
+    def invalidate(self):
+        """
+        Drop memoized result in every container, callback is called again on next build
+        Result kept by scope is not dropped. Return True when a result was kept
+        """
+        if self.__memo_caches is None:
+            return False
+        return len([cache for cache in list(self.__memo_caches) if cache.invalidate()]) > 0
+
+    def __memo_cache(self, containers):
+        cache = dict.get(containers, "_callback_cache").cache(self, self.__memo_ttl)
+        self.__memo_caches.add(cache)
+        return cache
+
+    def factories(self, containers):
+        # Callback result is unknown until it is called
+        return []
+
+    def validate(self, containers):
+        if not callable(self.__callback):
+            return ["Callback {} is not callable".format(self.__callback)]
+        return []
+
+    def __run(self, containers):
+        try:
+            return self.__callback(containers, *self.__dependency_args, **self.__dependency_kwargs)
+        except Exception as e:
+            self._logger.debug(sys.exc_info())
+            raise Exception("Callback {} failed".format(self.__callback)) from e
+
+    def __memo_scope(self):
+        scope = _find_scope(self.__memo)
+        if scope is None:
+            raise Exception("Callback {} require an active {} scope.".format(self.__callback, self.__memo))
+        return scope
+
+    def __result(self, containers):
+        memo = self.__memo
+        if memo is None:
+            return self.__run(containers)
+        if memo is True:
+            return self.__memo_cache(containers).instance(lambda: self.__run(containers))
+        return self.__memo_scope().instance(self, self.__run, containers)
+
+    async def __arun(self, containers):
+        result = self.__run(containers)
+        if inspect.isawaitable(result):
+            try:
+                result = await result
+            except Exception as e:
+                self._logger.debug(sys.exc_info())
+                raise Exception("Callback {} failed".format(self.__callback)) from e
+        return result
+
+    async def __aresult(self, containers):
+        memo = self.__memo
+        if memo is None:
+            return await self.__arun(containers)
+        if memo is True:
+            return await self.__memo_cache(containers).ainstance(lambda: self.__arun(containers))
+        return await self.__memo_scope().ainstance(self, self.__arun, containers)
+
+    def __create_unregistered(self, result):
         try:
-            result =  self.__callback(containers, *self.__dependency_args, **self.__dependency_kwargs)
+            return result(*self.__dependency_args, **self.__dependency_kwargs)
+        except Exception as e:
+            self._logger.debug(sys.exc_info())
+            raise Exception("Unable to create {} instance.".format(result)) from e
 
-            if not inspect.isclass(result):
-                return result
+    def build(self, containers):
+        result = self.__result(containers)
 
-            class_path = _retrieve_class_path(result)
-            obj = None
+        if not inspect.isclass(result):
+            return result
 
-            for path in class_path:
-                if isinstance(obj, ObjectFactoryMap):
-                    obj = getattr(obj, path)
-                else:
-                    obj = getattr(containers, path)
+        obj = _lookup_factory(containers, result)
 
-            # Unregister dependency return normal class ( always new instance )
-            if obj is None:
-                return result(*self.__dependency_args, **self.__dependency_kwargs)
+        # Unregister dependency return normal class ( always new instance )
+        if obj is None:
+            return self.__create_unregistered(result)
 
-            if self.__single_instance is False:
-                return obj.build(*self.__dependency_args, **self.__dependency_kwargs)
-            return obj.instance(*self.__dependency_args, **self.__dependency_kwargs)
-        except:
-            raise Exception("Unsupported object type")
+        # Creation error is raised by ObjectFactory as is
+        if self.__single_instance is False:
+            return obj.build(*self.__dependency_args, **self.__dependency_kwargs)
+        return obj.instance(*self.__dependency_args, **self.__dependency_kwargs)
+
+    async def abuild(self, containers):
+        """
+        Callback may be a coroutine function, returned class is created using ainstance() or abuild()
+        """
+        result = await self.__aresult(containers)
+
+        if not inspect.isclass(result):
+            return result
+
+        obj = _lookup_factory(containers, result)
+
+        if obj is None:
+            return self.__create_unregistered(result)
+
+        if self.__single_instance is False:
+            return await obj.abuild(*self.__dependency_args, **self.__dependency_kwargs)
+        return await obj.ainstance(*self.__dependency_args, **self.__dependency_kwargs)
+
+    def compile(self, containers, plan, stack):
+        plan.append((self.build, ((False, containers),), (), None))
+        return (True, len(plan) - 1)
 
 class DependencyGroup:
     """
     DependencyGroup
 
     Return list of ObjectFactory instance
+
+    Arguments:
+        group_name : registered group name
+        as_dict    : return { object name : instance } instead of list
+
+    Special Keyword Arguments:
+        _parallel    : create member concurrently on a thread pool, list keep registration order
+        _max_workers : thread pool size when _parallel is set
+        _stream      : return generator yielding member as soon as it is created instead of list
+        _errors      : failed member handling
+                       "log"    => member is skipped, failure is logged as warning ( default )
+                       "raise"  => raise Exception listing every failed member
+                       callable => called with ( factory, exception ) for each failed member
     """
 
-    def __init__(self, group_name, as_dict=False, _single_instance=True, *args, **kwargs):
+    __slots__ = ("__group_name", "__single_instance", "__dependency_args", "__dependency_kwargs", "__as_dict",
+                 "__parallel", "__max_workers", "__stream", "__errors")
+    _logger = logging.getLogger("easydi.DependencyGroup")
+
+    def __init__(self, group_name, as_dict=False, _single_instance=True, *args, _parallel=False,
+                 _max_workers=None, _stream=False, _errors="log", **kwargs):
+        if _errors not in ("log", "raise") and not callable(_errors):
+            raise Exception("Group errors must be log, raise or a callable")
+
         self.__group_name = group_name
         self.__single_instance = _single_instance
         self.__dependency_args = args
-        self.__dependency_kwargs = kwargs
+        self.__dependency_kwargs = kwargs or _EMPTY_KWARGS
         self.__as_dict = as_dict
-        self._logger = logging.getLogger("easydi.{}".format(self.__class__.__name__))
-
-    def build(self, containers):
-        if self.__as_dict:
-            objs = {}
+        self.__parallel = _parallel
+        self.__max_workers = _max_workers
+        self.__stream = _stream
+        self.__errors = _errors
+
+    def factories(self, containers):
+        if self.__group_name not in containers["_group"]:
+            return []
+        return list(containers["_group"][self.__group_name])
+
+    def validate(self, containers):
+        # Empty group is allowed
+        return []
+
+    def __create(self, obj):
+        if self.__single_instance is False:
+            return obj.build(*self.__dependency_args, **self.__dependency_kwargs)
+        return obj.instance(*self.__dependency_args, **self.__dependency_kwargs)
+
+    async def __acreate(self, index, obj):
+        try:
+            if self.__single_instance is False:
+                instance = await obj.abuild(*self.__dependency_args, **self.__dependency_kwargs)
+            else:
+                instance = await obj.ainstance(*self.__dependency_args, **self.__dependency_kwargs)
+            return index, instance, None
+        except Exception as e:
+            return index, None, e
+
+    def __resolve(self, members):
+        """
+        Yield ( member index, instance, exception ) in completion order
+        """
+        if not self.__parallel or len(members) < 2:
+            for index, obj in enumerate(members):
+                try:
+                    yield index, self.__create(obj), None
+                except Exception as e:
+                    yield index, None, e
+            return
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.__max_workers) as executor:
+            # Each member run in a copy of caller context, active scope is visible to the worker
+            futures = dict((executor.submit(contextvars.copy_context().run, self.__create, obj), index)
+                           for index, obj in enumerate(members))
+            for future in concurrent.futures.as_completed(futures):
+                try:
+                    yield futures[future], future.result(), None
+                except Exception as e:
+                    yield futures[future], None, e
+
+    def __report(self, failures):
+        if not len(failures):
+            return
+
+        if callable(self.__errors):
+            for obj, error in failures:
+                self.__errors(obj, error)
+        elif self.__errors == "raise":
+            raise Exception("Unable to create {} group member {}".format(
+                self.__group_name, ", ".join(obj.path for obj, _ in failures))) from failures[0][1]
         else:
-            objs = []
+            for obj, error in failures:
+                self._logger.warning("Unable to create %s group member %s: %s", self.__group_name, obj.path, error)
+
+    def __collect(self, members, results):
+        objs = {} if self.__as_dict else []
+        failures = []
+
+        for obj, (instance, error) in zip(members, results):
+            if error is not None:
+                failures.append((obj, error))
+            elif self.__as_dict:
+                objs[obj.name] = instance
+            else:
+                objs.append(instance)
 
-        if  self.__group_name not in containers["_group"]:
-            return objs
+        self.__report(failures)
+        return objs
 
-        for obj in containers["_group"][self.__group_name]:
-            try:
-                if self.__single_instance is False:
-                    instance = obj.build(*self.__dependency_args,
-                                          **self.__dependency_kwargs)
+    def build(self, containers):
+        if self.__stream:
+            return self.stream(containers)
+
+        members = self.factories(containers)
+        results = [None] * len(members)
+        for index, instance, error in self.__resolve(members):
+            results[index] = (instance, error)
+        return self.__collect(members, results)
+
+    def stream(self, containers):
+        """
+        Yield member instance as soon as it is created, ( name, instance ) when as_dict is set
+        """
+        members = self.factories(containers)
+        for index, instance, error in self.__resolve(members):
+            if error is not None:
+                self.__report([(members[index], error)])
+            elif self.__as_dict:
+                yield members[index].name, instance
+            else:
+                yield instance
+
+    async def abuild(self, containers):
+        """
+        Async version of build(), group member are created concurrently
+        """
+        if self.__stream:
+            return self.astream(containers)
+
+        members = self.factories(containers)
+        results = await asyncio.gather(*[self.__acreate(index, obj) for index, obj in enumerate(members)])
+        return self.__collect(members, [(instance, error) for _, instance, error in results])
+
+    async def astream(self, containers):
+        """
+        Async version of stream(), group member are created concurrently
+        """
+        members = self.factories(containers)
+        tasks = [asyncio.ensure_future(self.__acreate(index, obj)) for index, obj in enumerate(members)]
+        try:
+            for task in asyncio.as_completed(tasks):
+                index, instance, error = await task
+                if error is not None:
+                    self.__report([(members[index], error)])
+                elif self.__as_dict:
+                    yield members[index].name, instance
                 else:
-                    instance = obj.instance(*self.__dependency_args,
-                                         **self.__dependency_kwargs)
+                    yield instance
+        finally:
+            for task in tasks:
+                task.cancel()
 
-                if self.__as_dict:
-                    objs[obj.name] = instance
-                else:
-                    objs.append(instance)
-            except:
-                self._logger.debug(sys.exc_info())
+    def compile(self, containers, plan, stack):
+        plan.append((self.build, ((False, containers),), (), None))
+        return (True, len(plan) - 1)
 
-        return objs
+class LazyProxy:
+    """
+    LazyProxy
+
+    Stand in for an object that is resolved on first use, created by DependencyLazy
+    Resolution is thread safe and happen only once, afterward every access is forwarded to the real object
+    Attribute, call, container, comparison, arithmetic and ( async ) context manager protocol is forwarded
+    isinstance() works through __class__, type() return LazyProxy
+    """
+    __slots__ = ("__resolve", "__target", "__lock")
+
+    def __init__(self, resolve):
+        object.__setattr__(self, "_LazyProxy__resolve", resolve)
+        object.__setattr__(self, "_LazyProxy__target", _MISSING)
+        object.__setattr__(self, "_LazyProxy__lock", threading.Lock())
+
+    def __get_target(self):
+        target = self.__target
+        if target is not _MISSING:
+            return target
+
+        with self.__lock:
+            if self.__target is _MISSING:
+                object.__setattr__(self, "_LazyProxy__target", self.__resolve())
+                object.__setattr__(self, "_LazyProxy__resolve", None)
+            return self.__target
+
+    @property
+    def __class__(self):
+        return self.__get_target().__class__
+
+    def __getattr__(self, name):
+        return getattr(self.__get_target(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self.__get_target(), name, value)
+
+    def __delattr__(self, name):
+        delattr(self.__get_target(), name)
+
+    def __call__(self, *args, **kwargs):
+        return self.__get_target()(*args, **kwargs)
+
+    def __repr__(self):
+        if self.__target is _MISSING:
+            return "<LazyProxy unresolved>"
+        return repr(self.__target)
+
+    def __str__(self):
+        return str(self.__get_target())
+
+    def __bool__(self):
+        return bool(self.__get_target())
+
+    def __len__(self):
+        return len(self.__get_target())
+
+    def __iter__(self):
+        return iter(self.__get_target())
+
+    def __contains__(self, item):
+        return item in self.__get_target()
+
+    def __getitem__(self, key):
+        return self.__get_target()[key]
+
+    def __setitem__(self, key, value):
+        self.__get_target()[key] = value
+
+    def __delitem__(self, key):
+        del self.__get_target()[key]
+
+    def __eq__(self, other):
+        return self.__get_target() == other
+
+    def __ne__(self, other):
+        return self.__get_target() != other
+
+    def __hash__(self):
+        return hash(self.__get_target())
+
+    def __enter__(self):
+        return self.__get_target().__enter__()
+
+    def __exit__(self, *exc_info):
+        return self.__get_target().__exit__(*exc_info)
+
+    async def __aenter__(self):
+        return await self.__get_target().__aenter__()
+
+    async def __aexit__(self, *exc_info):
+        return await self.__get_target().__aexit__(*exc_info)
+
+    def __lt__(self, other):
+        return self.__get_target() < other
+
+    def __le__(self, other):
+        return self.__get_target() <= other
+
+    def __gt__(self, other):
+        return self.__get_target() > other
+
+    def __ge__(self, other):
+        return self.__get_target() >= other
+
+    def __neg__(self):
+        return -self.__get_target()
+
+    def __pos__(self):
+        return +self.__get_target()
+
+    def __abs__(self):
+        return abs(self.__get_target())
+
+    def __invert__(self):
+        return ~self.__get_target()
+
+    def __int__(self):
+        return int(self.__get_target())
+
+    def __float__(self):
+        return float(self.__get_target())
+
+    def __index__(self):
+        return operator.index(self.__get_target())
+
+    def __format__(self, format_spec):
+        return format(self.__get_target(), format_spec)
+
+    def __dir__(self):
+        return dir(self.__get_target())
+
+def _lazy_operator(op, reflected=False):
+    if reflected:
+        return lambda self, other: op(other, self._LazyProxy__get_target())
+    return lambda self, other: op(self._LazyProxy__get_target(), other)
+
+for _name in ("add", "sub", "mul", "matmul", "truediv", "floordiv", "mod", "pow", "lshift", "rshift",
+              "and", "xor", "or"):
+    _op = getattr(operator, _name + "_" if _name in ("and", "or") else _name)
+    setattr(LazyProxy, "__{}__".format(_name), _lazy_operator(_op))
+    setattr(LazyProxy, "__r{}__".format(_name), _lazy_operator(_op, reflected=True))
+    setattr(LazyProxy, "__i{}__".format(_name), _lazy_operator(getattr(operator, "i" + _name)))
+del _name, _op
+
+class DependencyLazy:
+    """
+    DependencyLazy
+
+    Inject LazyProxy, wrapped dependency is resolved on first attribute access instead of during object creation
+    Useful for expensive dependency that is only used on rare code path
+    Proxy resolve synchronously, async factory or async callback can not be lazy
+
+    Arguments:
+        dependency : class object or any Dependency object
+        _single_instance, args, kwargs : same as Dependency when class object is given
+    """
+    __slots__ = ("__dependency",)
+    _logger = logging.getLogger("easydi.DependencyLazy")
+
+    def __init__(self, dependency, _single_instance=True, *args, **kwargs):
+        if not isinstance(dependency, _DEPENDENCY_TYPES):
+            dependency = Dependency(dependency, _single_instance, *args, **kwargs)
+        self.__dependency = dependency
+
+    @property
+    def dependency(self):
+        return self.__dependency
+
+    def factories(self, containers):
+        # Resolved after creation, not required to create dependent object
+        return []
+
+    def validate(self, containers):
+        return self.__dependency.validate(containers)
+
+    def build(self, containers):
+        return LazyProxy(lambda: self.__resolve(containers))
+
+    def __resolve(self, containers):
+        for obj in self.__dependency.factories(containers):
+            if inspect.iscoroutinefunction(obj.class_object):
+                raise Exception("Lazy dependency {} is async, inject it using Dependency instead".format(obj.path))
+
+        value = self.__dependency.build(containers)
+        if inspect.isawaitable(value):
+            if inspect.iscoroutine(value):
+                value.close()
+            raise Exception("Lazy dependency resolved to an awaitable, inject it using Dependency instead")
+        return value
+
+    async def abuild(self, containers):
+        # Proxy resolve synchronously on first access
+        return self.build(containers)
+
+    def compile(self, containers, plan, stack):
+        plan.append((self.build, ((False, containers),), (), None))
+        return (True, len(plan) - 1)
+
+_DEPENDENCY_TYPES = (Dependency, DependencyPath, DependencyGroup, DependencyConfig, DependencyCallback, DependencyLazy)
 
 class Container:
     """
     Container of all object, should be called only once in application
-    Might not thread safe
+    Registration is not thread safe, call freeze() once all object are registered
+    to get a read only registry with lock free lookup
+
+    Arguments:
+        parent : create overlay on top of parent container, see overlay()
+        share_instances : overlay use parent singleton instead of creating its own
     """
-    def __init__(self):
-        self.__container = ObjectFactoryMap(
-            {"_group": ObjectFactoryMap(), "_alias": ObjectFactoryMap(), "_config": None})
+    def __init__(self, parent=None, share_instances=True):
+        self.__frozen = False
+        self.__compiled = False
+        self.__parent = parent
+        self.__layer = None
+
+        # Registry hold object registered to this container, container is the view used for lookup
+        self.__registry = ObjectFactoryMap(
+            {"_group": ObjectFactoryMap(), "_alias": ObjectFactoryMap(), "_config": None, "_index": {},
+             "_instrument": Instrumentation(), "_config_cache": ConfigCache(), "_deferred": {},
+             "_graph": None, "_memory_budget": MemoryBudget(),
+             "_callback_cache": CallbackCache()})
+
+        if parent is None:
+            self.__container = self.__registry
+        else:
+            if not isinstance(parent, Container):
+                raise Exception("Parent must be a Container instance")
+            self.__layer = _OverlayLayer(share_instances)
+            self.__container = self.__create_overlay_view()
+
+    def __create_overlay_view(self):
+        parent = self.__parent.list()
+        view = ObjectFactoryOverlayMap(
+            self.__registry, parent, self.__layer,
+            _index=OverlayIndex(self.__registry["_index"], parent, self.__layer),
+            _instrument=self.__registry["_instrument"],
+            _config_cache=self.__registry["_config_cache"],
+            _memory_budget=self.__registry["_memory_budget"],
+            _callback_cache=self.__registry["_callback_cache"],
+            _deferred=collections.ChainMap(self.__registry["_deferred"], parent["_deferred"]))
+        self.__layer.update_containers(view)
+        return view
+
+    def overlay(self, share_instances=True):
+        """
+        Create container on top of this container, creation cost does not depend on registry size
+        Object registered to the overlay replace this container object only for lookup through the overlay
+
+        share_instances :
+            True  => object not registered in the overlay is this container object, including its singleton
+            False => overlay create its own copy on first lookup, singleton is isolated per overlay
+                     and dependency is resolved through the overlay
+        """
+        return Container(self, share_instances)
+
+    @property
+    def parent(self):
+        return self.__parent
 
     def __getattr__(self, key):
         try:
-            return self.__container.get(key)
+            return _map_get(self.__container, key)
         except:
             try:
-                return self.__container._alias.get(key)
+                return _map_get(self.__container["_alias"], key)
             except:
                 pass
             raise Exception("Dependency {} is not register".format(key))
 
+    @property
+    def frozen(self):
+        return self.__frozen
+
+    @property
+    def instrumentation(self):
+        return self.__container["_instrument"]
+
+    @property
+    def config_cache(self):
+        return self.__container["_config_cache"]
+
+    @property
+    def memory_budget(self):
+        return self.__container["_memory_budget"]
+
+    @property
+    def callback_cache(self):
+        return self.__container["_callback_cache"]
+
+    def memory_report(self):
+        """
+        Return { object path : { bytes, idle, retain } } of every created single instance, largest first
+        Size is approximate, object shared between instance is counted in each of them
+        """
+        rows = []
+        for obj in self.__resolvable_factories():
+            retention = obj.retention
+            if retention is not None:
+                stats = retention.stats()
+                if stats["size"]:
+                    rows.append((obj.path, {"bytes": stats["bytes"], "idle": stats["idle"],
+                                            "retain": retention.policy}))
+            elif obj.singleton and obj.created:
+                rows.append((obj.path, {"bytes": _retained_size(obj.instance()), "idle": None,
+                                        "retain": "strong"}))
+        rows.sort(key=lambda row: row[1]["bytes"] or 0, reverse=True)
+        return dict(rows)
+
+    def freeze(self):
+        """
+        Replace registry with read only snapshot, lookup will no longer acquire lock
+        Calling register or update afterward will raise an Exception
+        """
+        if self.__frozen:
+            return self
+
+        self.__registry = self._freeze_containers(self.__registry)
+        if self.__parent is None:
+            self.__container = self.__registry
+        else:
+            self.__container = self.__create_overlay_view()
+        self.__frozen = True
+
+        for obj in self.list_object_factories():
+            obj.update_containers(self.__container)
+
+        # Plan hold reference to previous registry
+        if self.__compiled:
+            self.compile()
+
+        return self
+
+    def scope(self, name="request"):
+        """
+        Create new Scope, use as context manager
+        """
+        return Scope(name)
+
+    def compile(self):
+        """
+        Compile resolution plan of every registered object, see ObjectFactory._compile()
+        Plan is discarded when container is modified
+        Overlay compile its own object and isolated copy, shared parent object is compiled by the parent
+        """
+        for obj in self.__resolvable_factories(owned=True):
+            obj._compile()
+        self.__compiled = True
+        return self
+
+    def validate(self, raise_error=True):
+        """
+        Check every registered object dependency once, should be called during application start
+            - circular dependency, with full path
+            - DependencyPath that is not registered
+            - DependencyConfig without _config object
+
+        Raise Exception listing every error, or return list of error message if raise_error is False
+        Overlay check every object resolvable through it, including parent object
+        """
+        objs = self.__resolvable_factories()
+        errors = []
+        for obj in objs:
+            errors += obj.validate()
+        errors += self.__find_cycles(objs)
+
+        if len(errors) and raise_error:
+            raise Exception("Invalid container :\n    {}".format("\n    ".join(errors)))
+        return errors
+
+    def __find_cycles(self, objs):
+        errors = []
+        found = set()
+        visited = set()
+
+        def visit(obj, stack):
+            if obj in stack:
+                cycle = stack[stack.index(obj):] + [obj]
+                key = frozenset(cycle)
+                if key not in found:
+                    found.add(key)
+                    errors.append("Circular dependency {}".format(" -> ".join(dep.path for dep in cycle)))
+                return
+
+            if obj in visited:
+                return
+            visited.add(obj)
+
+            stack.append(obj)
+            for dep in obj.dependencies():
+                visit(dep, stack)
+            stack.pop()
+
+        for obj in objs:
+            visit(obj, [])
+        return errors
+
+    def deferred_report(self):
+        """
+        Report of object registered by import string
+
+        Return { module : { imported, seconds, objects } }
+            imported : module is in sys.modules
+            seconds  : import time when triggered by the container, None otherwise
+        """
+        report = {}
+        for path, record in self.__container["_deferred"].items():
+            module = report.setdefault(record["module"], {
+                "imported": record["module"] in sys.modules, "seconds": None, "objects": []})
+            module["objects"].append(path)
+            if record["seconds"] is not None:
+                module["seconds"] = (module["seconds"] or 0) + record["seconds"]
+        return report
+
+    def warmup(self, max_workers=None):
+        """
+        Create every singleton instance ahead of first use
+        Object are grouped in layer by their dependency, object in the same layer are created concurrently
+        Overlay also create parent object resolvable through it
+
+        Return dict of
+            timings  : { object path : creation time in seconds }
+            failures : { object path : exception }
+        """
+        return self.__warmup([obj for obj in self.__resolvable_factories() if obj.singleton], max_workers)
+
+    def __warmup(self, objs, max_workers):
+        pending = collections.OrderedDict((obj, None) for obj in objs)
+        for obj in pending:
+            pending[obj] = set(dep for dep in obj.dependencies() if dep in pending and dep is not obj)
+
+        report = {"timings": {}, "failures": {}}
+        failed = set()
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while pending:
+                layer = [obj for obj, deps in pending.items() if not deps]
+
+                if not len(layer):
+                    for obj in pending:
+                        report["failures"][obj.path] = Exception("Circular dependency {}".format(obj.path))
+                    break
+
+                futures = {}
+                for obj in layer:
+                    del pending[obj]
+                    failed_deps = [dep for dep in obj.dependencies() if dep in failed]
+                    if len(failed_deps):
+                        failed.add(obj)
+                        report["failures"][obj.path] = Exception("Dependency {} failed".format(failed_deps[0].path))
+                    else:
+                        futures[executor.submit(self.__warmup_instance, obj)] = obj
+
+                for future, obj in futures.items():
+                    try:
+                        report["timings"][obj.path] = future.result()
+                    except Exception as e:
+                        failed.add(obj)
+                        report["failures"][obj.path] = e
+
+                for deps in pending.values():
+                    deps.difference_update(layer)
+
+        return report
+
+    def prefork(self, max_workers=None, gc_freeze=False):
+        """
+        Prepare container in master process before forking worker, e.g. gunicorn with preload
+        Fork safe singleton is created so worker share it copy on write, fork unsafe object and every object
+        depending on it is left to the worker
+        Forked child call after_fork() automatically through os.register_at_fork
+
+        gc_freeze : call gc.freeze() so garbage collection in worker does not copy shared object
+
+        Return warmup report, see warmup()
+        """
+        objs = self.__resolvable_factories()
+        unsafe = self.__fork_unsafe_factories(objs)
+        report = self.__warmup([obj for obj in objs if obj.singleton and obj not in unsafe], max_workers)
+        _FORK_CONTAINERS.add(self)
+        if gc_freeze:
+            gc.freeze()
+        return report
+
+    def after_fork(self):
+        """
+        Reset container in forked child process
+        Lock is created again, instance of object registered with _fork_safe=False and every object depending on it
+        is created again on next use
+        """
+        objs = self.__resolvable_factories()
+        unsafe = self.__fork_unsafe_factories(objs)
+        for obj in objs:
+            obj._after_fork(drop=obj in unsafe)
+        if self.__compiled and len(unsafe):
+            # Plan hold reference to dropped singleton
+            self.__reset_plans()
+        self.__registry["_instrument"]._after_fork()
+        self.__registry["_config_cache"]._after_fork()
+        self.__registry["_memory_budget"]._after_fork()
+        self.__registry["_callback_cache"]._after_fork()
+        if self.__layer is not None:
+            self.__layer._after_fork()
+
+    def __fork_unsafe_factories(self, objs):
+        """
+        Return object registered with _fork_safe=False and every object depending on it, directly or not
+        """
+        unsafe = {}
+
+        def reach_unsafe(obj, visiting):
+            if obj not in unsafe:
+                visiting.add(obj)
+                unsafe[obj] = not obj.fork_safe or any(
+                    reach_unsafe(dep, visiting) for dep in obj.dependencies() if dep not in visiting)
+                visiting.discard(obj)
+            return unsafe[obj]
+
+        return set(obj for obj in objs if reach_unsafe(obj, set()))
+
+    def close(self, timeout=None, max_workers=None):
+        """
+        Dispose every instance created by this container, see ObjectFactory.dispose()
+        Object is disposed before its dependency, independent object are disposed concurrently
+        Scoped instance is disposed by its Scope, shared parent object is closed by the parent
+
+        Arguments:
+            timeout     : seconds to wait for each object from the time its dispose start,
+                          object still running is reported and left running in background
+            max_workers : maximum object disposed at the same time, timed out object does not count
+
+        Return dict of
+            timings  : { object path : dispose time in seconds }
+            failures : { object path : exception }
+            timeouts : [ object path ]
+            skipped  : [ object path ] dependency of timed out object, still in use so it is not disposed
+        """
+        report = {"timings": {}, "failures": {}, "timeouts": [], "skipped": []}
+        max_workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+        layers, dependents = self.__dispose_layers()
+        unfinished = set()
+
+        for layer in layers:
+            objs = self.__skip_unfinished(layer, dependents, unfinished, report)
+            results = self.__dispose_threads(objs, timeout, max_workers)
+            for obj in objs:
+                result = results.get(obj, _MISSING)
+                if result is _MISSING:
+                    unfinished.add(obj)
+                    report["timeouts"].append(obj.path)
+                elif isinstance(result, Exception):
+                    report["failures"][obj.path] = result
+                else:
+                    report["timings"][obj.path] = result
+
+        if self.__compiled:
+            # Plan hold reference to disposed singleton
+            self.__reset_plans()
+        return report
+
+    async def aclose(self, timeout=None):
+        """
+        Async version of close(), object in the same layer are disposed concurrently using ObjectFactory.adispose()
+        """
+        report = {"timings": {}, "failures": {}, "timeouts": [], "skipped": []}
+        layers, dependents = self.__dispose_layers()
+        unfinished = set()
+
+        for layer in layers:
+            objs = self.__skip_unfinished(layer, dependents, unfinished, report)
+            results = await asyncio.gather(*[self.__atimed(obj.adispose, timeout) for obj in objs],
+                                           return_exceptions=True)
+            for obj, result in zip(objs, results):
+                if isinstance(result, asyncio.TimeoutError):
+                    unfinished.add(obj)
+                    report["timeouts"].append(obj.path)
+                elif isinstance(result, BaseException):
+                    report["failures"][obj.path] = result
+                else:
+                    report["timings"][obj.path] = result
+
+        if self.__compiled:
+            self.__reset_plans()
+        return report
+
+    @staticmethod
+    def __skip_unfinished(layer, dependents, unfinished, report):
+        """
+        Return object of the layer to dispose, object used by timed out or skipped object is skipped
+        """
+        objs = []
+        for obj in layer:
+            if dependents[obj] & unfinished:
+                unfinished.add(obj)
+                report["skipped"].append(obj.path)
+            else:
+                objs.append(obj)
+        return objs
+
+    @staticmethod
+    def __dispose_threads(objs, timeout, max_workers):
+        """
+        Dispose each object in a daemon thread, at most max_workers running at the same time
+        Timeout start when the object dispose start, timed out object is left running and no longer counted
+        Return { object : dispose time or exception }, timed out object is missing
+        """
+        condition = threading.Condition()
+        pending = collections.deque(objs)
+        finished = {}
+        results = {}
+        running = {}
+
+        def dispose(obj):
+            start = time.perf_counter()
+            try:
+                obj.dispose()
+                result = time.perf_counter() - start
+            except Exception as e:
+                result = e
+            with condition:
+                finished[obj] = result
+                condition.notify_all()
+
+        with condition:
+            while len(pending) or len(running):
+                while len(pending) and len(running) < max_workers:
+                    obj = pending.popleft()
+                    running[obj] = time.monotonic()
+                    threading.Thread(target=dispose, args=(obj,), daemon=True).start()
+
+                for obj in [obj for obj in running if obj in finished]:
+                    del running[obj]
+                    results[obj] = finished[obj]
+
+                if timeout is not None:
+                    now = time.monotonic()
+                    for obj in [obj for obj, start in running.items() if now - start >= timeout]:
+                        del running[obj]
+
+                if len(running):
+                    deadline = None if timeout is None else min(running.values()) + timeout - time.monotonic()
+                    condition.wait(deadline)
+        return results
+
+    def __dispose_layers(self):
+        """
+        Group created object in layer, object is in a later layer than every object depending on it
+        Return ( layers, { object : created object depending on it } )
+        """
+        objs = [obj for obj in self.__resolvable_factories(owned=True) if obj.created]
+        created = set(objs)
+        reachable = {}
+
+        def created_dependencies(obj, visiting):
+            # Dependency through transient object still has to be disposed later
+            if obj in reachable:
+                return reachable[obj]
+            found = set()
+            visiting.add(obj)
+            for dep in obj.dependencies():
+                if dep in visiting:
+                    continue
+                if dep in created:
+                    found.add(dep)
+                found |= created_dependencies(dep, visiting)
+            visiting.discard(obj)
+            reachable[obj] = found
+            return found
+
+        dependents = dict((obj, set()) for obj in objs)
+        for obj in objs:
+            for dep in created_dependencies(obj, set()):
+                if dep is not obj:
+                    dependents[dep].add(obj)
+
+        remaining = dict((obj, set(deps)) for obj, deps in dependents.items())
+        layers = []
+        while remaining:
+            layer = [obj for obj, deps in remaining.items() if not deps]
+            if not len(layer):
+                # Circular dependency, dispose the rest together
+                layer = list(remaining)
+            for obj in layer:
+                del remaining[obj]
+            for deps in remaining.values():
+                deps.difference_update(layer)
+            layers.append(layer)
+        return layers, dependents
+
+    @staticmethod
+    async def __atimed(dispose, timeout):
+        start = time.perf_counter()
+        await asyncio.wait_for(dispose(), timeout)
+        return time.perf_counter() - start
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    def __warmup_instance(self, obj):
+        start = time.perf_counter()
+        obj.instance()
+        return time.perf_counter() - start
+
+    def _freeze_containers(self, objects):
+        frozen = {}
+        for key, val in _map_items(objects):
+            if isinstance(val, ObjectFactoryMap):
+                val = self._freeze_containers(val)
+            elif isinstance(val, (dict, collections.ChainMap)):
+                # Flat index keyed by class object and dotted path
+                val = types.MappingProxyType(dict(val))
+            elif isinstance(val, list):
+                val = tuple(val)
+            frozen[key] = val
+        return FrozenObjectFactoryMap(frozen)
+
+    def __check_frozen(self):
+        if self.__frozen:
+            raise Exception("Container is frozen, registry can not be modified")
+
+    def __reset_plans(self):
+        self.__compiled = False
+        for obj in self.__resolvable_factories(owned=True):
+            obj.reset_plan()
+
     def update(self, container):
+        self.__check_frozen()
+
         if not isinstance(container, Container):
             raise Exception("Can only update form Container instance")
 
-        self._update_containers(self.__container, container.list())
+        self._update_containers(self.__registry, container.list())
 
+        self.__compiled = False
         for obj in self.list_object_factories():
             obj.update_containers(self.__container)
 
     def _update_containers(self, dict1, dict2):
-        for key, val in dict2.items():
+        for key, val in _map_items(dict2):
+            if isinstance(val, (Instrumentation, ConfigCache, MemoryBudget, CallbackCache)):
+                # Each container keep its own instrumentation, config cache, memory budget and callback result
+                continue
+
+            if key == "_graph":
+                dict1[key] = _map_get(dict1, key) or val
+                continue
+
             if key in dict1:
                 if isinstance(dict1[key], ObjectFactoryMap):
                     self._update_containers(dict1[key], val)
-                elif isinstance(dict1[key], ObjectFactory):
+                elif isinstance(dict1[key], ObjectFactory) or dict1[key] is None:
                     if val is not None:
                         dict1[key] = val
                 elif isinstance(dict1[key], list) and isinstance(val, list):
@@ -364,40 +3408,131 @@ class Container:
     def list_object_factories(self, objects=None):
         objs = []
 
-        objects = objects or self.__container
+        objects = objects or self.__registry
 
-        for k, v in objects.items():
-            if isinstance(v, dict):
-                if k in ["_group", "_alias", "_config"]:
-                    continue
+        for k, v in _map_items(objects):
+            if k in _RESERVED_KEYS:
+                continue
 
+            if isinstance(v, dict):
                 objs += self.list_object_factories(v)
             else:
                 objs.append(v)
         return objs
 
+    def resolve_many(self, keys, as_dict=False, build=False, parallel=False, max_workers=None):
+        """
+        Resolve multiple object in a single call instead of one lookup per object
+
+        Arguments:
+            keys        : list of class object, full dotted path or package.module:Class import string
+            as_dict     : return { key : instance } instead of list in the same order
+            build       : create new instance instead of single instance
+            parallel    : create object concurrently on a thread pool
+            max_workers : thread pool size when parallel is set
+
+        Registry is read once, each object is resolved once even when requested twice
+        Graph scoped dependency is shared by every object of the batch
+        """
+        containers = self.__container
+        index = containers["_index"]
+
+        objs = []
+        for key in keys:
+            lookup = ".".join(_retrieve_class_path(key)) if isinstance(key, str) and ":" in key else key
+            obj = index.get(lookup)
+            if obj is None:
+                # Class registered by import string and not imported yet
+                obj = _lookup_factory(containers, lookup)
+            if obj is None:
+                raise Exception("Object {} is not register in containers".format(key))
+            objs.append(obj)
+
+        unique = list(dict.fromkeys(objs))
+        create = self.__build_instance if build else self.__single_instance
+
+        token = None
+        if _GRAPH.get() is None and _map_get(containers, "_graph"):
+            token = _GRAPH.set({})
+        try:
+            if parallel and len(unique) > 1:
+                with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    # Worker run in a copy of this context, graph and active scope is shared
+                    futures = [executor.submit(contextvars.copy_context().run, create, obj) for obj in unique]
+                    instances = dict(zip(unique, [future.result() for future in futures]))
+            else:
+                instances = dict((obj, create(obj)) for obj in unique)
+        finally:
+            if token is not None:
+                _GRAPH.reset(token)
+
+        if as_dict:
+            return dict((key, instances[obj]) for key, obj in zip(keys, objs))
+        return [instances[obj] for obj in objs]
+
+    @staticmethod
+    def __single_instance(obj):
+        return obj.instance()
+
+    @staticmethod
+    def __build_instance(obj):
+        return obj.build()
+
+    def __resolvable_factories(self, owned=False):
+        """
+        Every object resolvable through this container, overlay include parent object
+        owned : exclude parent object shared with the overlay
+        """
+        if self.__parent is None:
+            return self.list_object_factories()
+
+        objs = self.list_object_factories(self.__container)
+        if owned and self.__layer.shared:
+            own = set(self.list_object_factories())
+            objs = [obj for obj in objs if obj in own]
+        return objs
+
     def list(self):
         return self.__container
 
     def register(self, class_object, *args, **kwargs):
+        self.__check_frozen()
+
+        if self.__compiled:
+            self.__reset_plans()
+
         # Change class_object to Dependency object by default
-        args = [(Dependency(arg) if not isinstance(
-            arg, (Dependency, DependencyPath, DependencyGroup, DependencyConfig, DependencyCallback)) else arg) for arg in args]
+        args = [(Dependency(arg) if not isinstance(arg, _DEPENDENCY_TYPES) else arg) for arg in args]
 
         object_group = kwargs.pop("_group", [])
         object_alias = kwargs.pop("_alias", None)
         object_config = kwargs.pop("_config", False)
-
-        kwargs = dict((k, Dependency(v) if not isinstance(
-            v, (Dependency, DependencyPath, DependencyGroup, DependencyConfig)) else v) for k, v in kwargs.items())
-
-        obj = ObjectFactory(class_object, self.__container, *args, **kwargs)
+        object_scope = kwargs.pop("_scope", None)
+        object_lifetime = dict((key, kwargs.pop(key)) for key in
+                               ("_pool", "_pool_timeout", "_pool_idle", "_cache", "_cache_ttl", "_fork_safe",
+                                "_finalizer", "_retain", "_retain_idle", "_autowire")
+                               if key in kwargs)
+
+        kwargs = dict((k, Dependency(v) if not isinstance(v, _DEPENDENCY_TYPES) else v) for k, v in kwargs.items())
+
+        obj = ObjectFactory(class_object, self.__container, *args, _scope=object_scope, **object_lifetime, **kwargs)
+        if object_scope == _GRAPH_SCOPE:
+            # Graph is only opened on top level resolution when graph scoped object exist
+            self.__registry["_graph"] = True
         self.__group_factory(obj, object_group)
         self.__add_alias(obj, object_alias)
         self.__set_config(obj, object_config)
 
         paths = _retrieve_class_path(class_object)
-        current_level = self.__container
+        current_level = self.__registry
+
+        # Flat index for single lookup resolution, nested map is kept for attribute access
+        if isinstance(class_object, str):
+            self.__registry["_deferred"][".".join(paths)] = {
+                "module": _split_import_path(class_object)[0], "seconds": None}
+        else:
+            self.__registry["_index"][class_object] = obj
+        self.__registry["_index"][".".join(paths)] = obj
 
         for i, path in enumerate(paths):
             if (i == len(paths) - 1):
@@ -409,13 +3544,14 @@ class Container:
 
     def __set_config(self, obj, as_config=True):
         if as_config:
-            self.__container["_config"] = obj
+            self.__registry["_config"] = obj
+            self.__registry["_config_cache"].invalidate()
 
     def __add_alias(self, obj, alias_name=None):
         if alias_name is None:
             return False
 
-        self.__container._alias[alias_name] = obj
+        self.__registry._alias[alias_name] = obj
 
     def __group_factory(self, obj, group_name=None):
         if group_name is None or not len(group_name):
@@ -425,7 +3561,22 @@ class Container:
             group_name = [group_name]
 
         for name in group_name:
-            if name not in self.__container._group:
-                self.__container._group[name] = []
+            if name not in self.__registry._group:
+                self.__registry._group[name] = []
+
+            self.__registry._group[name].append(obj)
+
+def _after_fork_in_child():
+    """
+    Lock held by other thread of the parent process is never released in the child, create them again
+    """
+    global _THREADING_LOCK, _FACTORY_LOCK, _GRAPH_LOCK
+    _THREADING_LOCK = rwlock.RWLockWrite()
+    _FACTORY_LOCK = threading.Lock()
+    _GRAPH_LOCK = threading.Lock()
+
+    for container in list(_FORK_CONTAINERS):
+        container.after_fork()
 
-            self.__container._group[name].append(obj)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
@@ -18,10 +18,12 @@ setup(
     author_email = 'wiryonolau@gmail.com',      
     url = 'https://github.com/wiryonolau/python-easydi',  
     install_requires=install_requires,
+    python_requires='>=3.8',
     classifiers=[
         'Programming Language :: Python :: 3',
-        'Programming Language :: Python :: 3.4',
-        'Programming Language :: Python :: 3.5',
-        'Programming Language :: Python :: 3.6',
+        'Programming Language :: Python :: 3.8',
+        'Programming Language :: Python :: 3.9',
+        'Programming Language :: Python :: 3.10',
+        'Programming Language :: Python :: 3.11',
     ],
 )
@@ -0,0 +1,6 @@
+class DeferredService:
+    def __init__(self, value):
+        self.value = value
+
+class DeferredUnused:
+    pass
@@ -0,0 +1,95 @@
+"""
+Compare registration memory of the original storage layout with the current one
+Used by TestMemory and the benchmark suite
+
+    python3 -m test.memory_layout
+
+Original layout is rebuilt here with the same attribute as the first release
+    - ObjectFactory and Dependency object keep attribute and logger in instance __dict__
+    - ObjectFactoryMap mirror every item to its instance __dict__
+"""
+import gc
+import logging
+import tracemalloc
+from easydi import *
+
+class BaselineObjectFactoryMap(dict):
+    def __setitem__(self, key, value):
+        dict.__setitem__(self, key, value)
+        self.__dict__.update({key: value})
+
+class BaselineObjectFactory:
+    def __init__(self, class_object, containers, *args, **kwargs):
+        self.__class_object = class_object
+        self.__containers = containers
+        self.__dependency_args = args
+        self.__dependency_kwargs = kwargs
+        self.__instance = None
+        self._logger = logging.getLogger("easydi.{}".format(self.__class__.__name__))
+
+class BaselineDependency:
+    def __init__(self, _class, _single_instance=True, *args, **kwargs):
+        self.__class = _class
+        self.__single_instance = _single_instance
+        self.__dependency_args = args
+        self.__dependency_kwargs = kwargs
+        self._logger = logging.getLogger("easydi.{}".format(self.__class__.__name__))
+
+class BaselineDependencyConfig:
+    def __init__(self, config_path, placeholder=None, value_format=str):
+        self.__config_path = config_path
+        self.__placeholder = placeholder
+        self.__value_format = value_format
+        self._logger = logging.getLogger("easydi.{}".format(self.__class__.__name__))
+
+class BaselineContainer:
+    def __init__(self):
+        self.__container = BaselineObjectFactoryMap()
+
+    def register(self, class_object, *args, **kwargs):
+        args = [(BaselineDependency(arg) if not isinstance(arg, (BaselineDependency, BaselineDependencyConfig))
+                 else arg) for arg in args]
+        kwargs = dict((k, BaselineDependency(v) if not isinstance(v, (BaselineDependency, BaselineDependencyConfig))
+                       else v) for k, v in kwargs.items())
+
+        obj = BaselineObjectFactory(class_object, self.__container, *args, **kwargs)
+
+        paths = class_object.__module__.split(".") + [class_object.__qualname__]
+        current_level = self.__container
+        for i, path in enumerate(paths):
+            if (i == len(paths) - 1):
+                current_level[path] = obj
+            else:
+                if path not in current_level:
+                    current_level[path] = BaselineObjectFactoryMap()
+            current_level = current_level[path]
+
+def create_classes(count):
+    return [type("MemoryClass{}".format(i), (), {"__module__": "memory.pkg{}.mod".format(i % 20)})
+            for i in range(count)]
+
+def measure(container, config, classes):
+    """
+    Return traced bytes per registration of ( class, config dependency, list dependency )
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        for cls in classes:
+            container.register(cls, config("section1.key1"), [1])
+        gc.collect()
+        return (tracemalloc.get_traced_memory()[0] - before) / len(classes)
+    finally:
+        tracemalloc.stop()
+
+def run(count=2000):
+    return {
+        "baseline": measure(BaselineContainer(), BaselineDependencyConfig, create_classes(count)),
+        "current": measure(Container(), DependencyConfig, create_classes(count))
+    }
+
+if __name__ == "__main__":
+    results = run()
+    for name, size in results.items():
+        print("{:<10} {:>10.0f} bytes/registration".format(name, size))
@@ -1,9 +1,17 @@
+import asyncio
+import gc
 import os
 import sys
 import unittest
+import unittest.mock
 import traceback
 import inspect
+import threading
+import time
+import typing
+import easydi
 from easydi import *
+from test import memory_layout
 
 class ProviderA:
     def __init__(self, value):
@@ -81,6 +89,11 @@ class Config:
 
         self._config[section][key] = value
 
+class TenantConfig(Config):
+    def __init__(self):
+        super().__init__()
+        self.set("section1", "key1", "tenant")
+
 class EasyDiTest(unittest.TestCase):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -141,6 +154,13 @@ class TestDependencyPath(EasyDiTest):
         s1 = self.retrieve_instance(ServiceA).instance()
         self.assertTrue(isinstance(s1, ServiceA))
 
+class MemoizedService:
+    def __init__(self, value):
+        self.value = value
+
+class MemoizedScopeService(MemoizedService):
+    pass
+
 class TestDependencyCallback(EasyDiTest):
     def test(self):
         # Test not registering ProviderB
@@ -162,6 +182,68 @@ class TestDependencyCallback(EasyDiTest):
         self.assertTrue(isinstance(s1.provider, ProviderB))
         self.assertTrue(s1.provider.value == "B.test")
 
+    def test_memoize(self):
+        calls = []
+        def load_schema(container, name):
+            calls.append(name)
+            time.sleep(0.05)
+            return {"name": name}
+
+        schema = DependencyCallback(load_schema, True, "schema", _memoize=True)
+        self._container.register(MemoizedService, schema)
+        self._container.register(MemoizedScopeService,
+                                 DependencyCallback(load_schema, True, "request", _memoize="request"))
+
+        threads = [threading.Thread(target=self.retrieve_instance(MemoizedService).build) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        first = self.retrieve_instance(MemoizedService).build().value
+        self.assertTrue(calls == ["schema"] and first is self.retrieve_instance(MemoizedService).build().value)
+
+        self.assertTrue(schema.invalidate())
+        self.assertTrue(self.retrieve_instance(MemoizedService).build().value is not first)
+
+        # Kept until the scope end
+        with self.assertRaises(Exception):
+            self.retrieve_instance(MemoizedScopeService).build()
+        with self._container.scope("request"):
+            self.assertTrue(self.retrieve_instance(MemoizedScopeService).build().value
+                            is self.retrieve_instance(MemoizedScopeService).build().value)
+        with self._container.scope("request"):
+            self.retrieve_instance(MemoizedScopeService).build()
+        self.assertTrue(calls == ["schema", "schema", "request", "request"])
+
+    def test_memoize_overlay(self):
+        load = lambda container: "schema-for-" + container["_config"].instance().get("section1.key1")
+        schema = DependencyCallback(load, _memoize=True)
+        self._container.register(MemoizedService, schema)
+        self.assertTrue(self.retrieve_instance(MemoizedService).build().value == "schema-for-1")
+
+        # Isolated overlay keep its own result
+        overlay = self._container.overlay(share_instances=False)
+        overlay.register(TenantConfig, _config=True)
+        self.assertTrue(overlay.test.test_container.MemoizedService.build().value == "schema-for-tenant")
+        self.assertTrue(self.retrieve_instance(MemoizedService).build().value == "schema-for-1")
+
+        self.assertTrue(overlay.callback_cache.invalidate() == 1)
+        self.assertTrue(schema.invalidate())
+        self.assertFalse(schema.invalidate())
+
+    def test_memoize_ttl(self):
+        values = iter(range(10))
+        counter = DependencyCallback(lambda container: next(values), _memoize=True, _memoize_ttl=0.05)
+        self._container.register(MemoizedService, counter)
+
+        self.assertTrue(self.retrieve_instance(MemoizedService).build().value == 0)
+        self.assertTrue(self.retrieve_instance(MemoizedService).build().value == 0)
+        time.sleep(0.06)
+        self.assertTrue(asyncio.run(self.retrieve_instance(MemoizedService).abuild()).value == 1)
+
+        with self.assertRaises(Exception):
+            DependencyCallback(self.callback, _memoize_ttl=1)
+
     def callback(self, container):
         config = container["_config"].instance()
         if config.get("section1.key1") == "1":
@@ -169,6 +251,32 @@ class TestDependencyCallback(EasyDiTest):
         else:
             return ProviderB(config.get("section1.key3", "test"))
  
+class BarrierPlugin:
+    barrier = None
+
+    def __init__(self):
+        # Only pass when every member is created at the same time
+        BarrierPlugin.barrier.wait()
+
+class BarrierPluginA(BarrierPlugin):
+    pass
+
+class BarrierPluginB(BarrierPlugin):
+    pass
+
+class BarrierPluginC(BarrierPlugin):
+    pass
+
+class GatedPlugin:
+    gate = None
+
+    def __init__(self):
+        if not GatedPlugin.gate.wait(5):
+            raise Exception("Gate is not opened")
+
+class FreePlugin:
+    pass
+
 class TestDependencyGroup(EasyDiTest):
     def test(self):
         self._container.register(ProviderA, DependencyConfig("section1.key2"), _group="providers")
@@ -178,3 +286,1114 @@ class TestDependencyGroup(EasyDiTest):
 
         s1 = self.retrieve_instance(ServiceC).instance()
         self.assertTrue((s1.has(ProviderA) and s1.has(ProviderB)))
+
+    def test_parallel(self):
+        self._container.register(BarrierPluginA, _group="plugins")
+        self._container.register(BarrierPluginB, _group="plugins")
+        self._container.register(BarrierPluginC, _group="plugins")
+        BarrierPlugin.barrier = threading.Barrier(3, timeout=5)
+
+        plugins = DependencyGroup("plugins", _parallel=True, _errors="raise").build(self._container.list())
+        self.assertTrue([type(plugin) for plugin in plugins] == [BarrierPluginA, BarrierPluginB, BarrierPluginC])
+
+        plugins = asyncio.run(DependencyGroup("plugins", True).abuild(self._container.list()))
+        self.assertTrue(sorted(plugins.keys()) == ["BarrierPluginA", "BarrierPluginB", "BarrierPluginC"])
+
+    def test_stream(self):
+        self._container.register(GatedPlugin, _group="plugins")
+        self._container.register(FreePlugin, _group="plugins")
+        GatedPlugin.gate = threading.Event()
+
+        stream = DependencyGroup("plugins", _parallel=True, _stream=True, _errors="raise").build(
+            self._container.list())
+        self.assertTrue(inspect.isgenerator(stream))
+        self.assertTrue(type(next(stream)) is FreePlugin)
+        GatedPlugin.gate.set()
+        self.assertTrue(type(next(stream)) is GatedPlugin)
+        self.assertTrue(len(list(stream)) == 0)
+
+        async def consume():
+            group = DependencyGroup("plugins", _single_instance=False, _stream=True, _errors="raise")
+            return [plugin async for plugin in await group.abuild(self._container.list())]
+        self.assertTrue(len(asyncio.run(consume())) == 2)
+
+    def test_errors(self):
+        self._container.register(ProviderA, DependencyConfig("section1.key1"), _group="providers")
+        self._container.register(BrokenProvider, _group="providers")
+
+        with self.assertLogs("easydi.DependencyGroup", "WARNING") as logs:
+            self.assertTrue(len(DependencyGroup("providers").build(self._container.list())) == 1)
+        self.assertTrue("BrokenProvider" in logs.output[0])
+
+        with self.assertRaises(Exception) as context:
+            DependencyGroup("providers", _errors="raise").build(self._container.list())
+        self.assertTrue("BrokenProvider" in str(context.exception))
+
+        failures = []
+        DependencyGroup("providers", _parallel=True,
+                        _errors=lambda obj, error: failures.append(obj.name)).build(self._container.list())
+        self.assertTrue(failures == ["BrokenProvider"])
+
+class TestFreeze(EasyDiTest):
+    def test(self):
+        self._container.register(ProviderA, DependencyConfig("section1.key1"))
+        self._container.register(ServiceA, ProviderA)
+        self._container.freeze()
+
+        self.assertTrue(self._container.frozen)
+        self.assertTrue(isinstance(self._container.list(), FrozenObjectFactoryMap))
+
+        s1 = self.retrieve_instance(ServiceA).instance()
+        self.assertTrue(isinstance(s1.provider, ProviderA))
+        self.assertTrue(s1.provider.value == "A.1")
+
+        with self.assertRaises(Exception):
+            self._container.register(ProviderB)
+
+        with self.assertRaises(Exception):
+            self._container.update(Container())
+
+        with self.assertRaises(Exception):
+            self._container.list()["_config"] = None
+
+class TestFactoryIndex(EasyDiTest):
+    def test(self):
+        self._container.register(ProviderA, DependencyConfig("section1.key1"))
+
+        other = Container()
+        other.register(ServiceA, DependencyPath("test.test_container.ProviderA"))
+        self._container.update(other)
+
+        index = self._container.list()["_index"]
+        self.assertTrue(index[ServiceA] is index["test.test_container.ServiceA"])
+        self.assertTrue(index[ServiceA] is self._container.test.test_container.ServiceA)
+
+        s1 = index[ServiceA].instance()
+        self.assertTrue(isinstance(s1.provider, ProviderA))
+
+class TestCompile(EasyDiTest):
+    def test(self):
+        self._container.register(ProviderA, DependencyConfig("section1.key1"))
+        self._container.register(ProviderB, DependencyConfig("section1.key2"))
+        self._container.register(ServiceA, Dependency(ProviderB, False))
+        self._container.register(ServiceC, providers=Dependency(ProviderA))
+        self._container.compile()
+
+        factory = self.retrieve_instance(ServiceA)
+        self.assertTrue(factory.compiled)
+
+        s1 = factory.build()
+        s2 = factory.build()
+        self.assertTrue(isinstance(s1.provider, ProviderB))
+        self.assertTrue(s1.provider.value == "B.2")
+        self.assertTrue(s1.provider is not s2.provider)
+
+        c1 = self.retrieve_instance(ServiceC).build()
+        c2 = self.retrieve_instance(ServiceC).build()
+        self.assertTrue(c1.providers is c2.providers)
+        self.assertTrue(c1.providers is self.retrieve_instance(ProviderA).instance())
+
+        self._container.register(ServiceB, DependencyConfig("section1.key1"))
+        self.assertFalse(factory.compiled)
+
+    def test_error(self):
+        # Compiled build report the same error as uncompiled build
+        self._container.register(ServiceA, ProviderB)
+        self._container.register(ProviderB, DependencyConfig("section1.key1"))
+        self._container.register(ProviderA, DependencyConfig("section1.key1"))
+        self._container.register(ServiceC, ServiceA)
+
+        messages = []
+        for compile in (False, True):
+            if compile:
+                self._container.compile()
+            for obj in (ProviderA, ServiceC):
+                with self.assertRaises(Exception) as context:
+                    self.retrieve_instance(obj).build("extra")
+                messages.append(str(context.exception))
+                self.assertTrue(context.exception.__cause__ is not None)
+
+        self.assertTrue(messages[:2] == messages[2:], messages)
+        self.assertTrue("ProviderA" in messages[0] and "ServiceC" in messages[1])
+
+class SlowService:
+    created = 0
+
+    def __init__(self):
+        SlowService.created += 1
+        time.sleep(0.05)
+
+class CircularA:
+    def __init__(self, b):
+        self.b = b
+
+class CircularB:
+    def __init__(self, a):
+        self.a = a
+
+class TestThreadSafeInstance(EasyDiTest):
+    def test(self):
+        self._container.register(SlowService)
+        factory = self.retrieve_instance(SlowService)
+
+        instances = []
+        threads = [threading.Thread(target=lambda: instances.append(factory.instance())) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertTrue(SlowService.created == 1)
+        self.assertTrue(len(instances) == 8)
+        self.assertTrue(all(instance is instances[0] for instance in instances))
+
+    def test_circular(self):
+        self._container.register(CircularA, CircularB)
+        self._container.register(CircularB, CircularA)
+
+        with self.assertRaises(Exception) as context:
+            self.retrieve_instance(CircularA).instance()
+
+        error = context.exception
+        messages = []
+        while error is not None:
+            messages.append(str(error))
+            error = error.__context__
+        self.assertTrue(any("Circular dependency" in message for message in messages))
+
+class BrokenProvider:
+    def __init__(self):
+        raise Exception("Broken")
+
+class TestWarmup(EasyDiTest):
+    def test(self):
+        self._container.register(ProviderA, DependencyConfig("section1.key1"))
+        self._container.register(ServiceA, ProviderA)
+        self._container.register(BrokenProvider)
+        self._container.register(ServiceC, Dependency(BrokenProvider))
+
+        report = self._container.warmup(max_workers=4)
+
+        self.assertTrue("test.test_container.ServiceA" in report["timings"])
+        self.assertTrue("test.test_container.ProviderA" in report["timings"])
+        self.assertTrue("test.test_container.Config" in report["timings"])
+        self.assertTrue("test.test_container.BrokenProvider" in report["failures"])
+        self.assertTrue("test.test_container.ServiceC" in report["failures"])
+
+        factory = self.retrieve_instance(ServiceA)
+        self.assertTrue(factory.dependencies() == [self.retrieve_instance(ProviderA)])
+        self.assertTrue(factory.instance().provider is self.retrieve_instance(ProviderA).instance())
+
+class AsyncPool:
+    created = 0
+
+    def __init__(self, value):
+        AsyncPool.created += 1
+        self.value = value
+
+async def create_async_pool(value):
+    await asyncio.sleep(0.05)
+    return AsyncPool(value)
+
+async def async_callback(container):
+    await asyncio.sleep(0.05)
+    return ProviderB("async")
+
+class TestAsync(EasyDiTest):
+    def test(self):
+        self._container.register(create_async_pool, DependencyConfig("section1.key1"))
+        self._container.register(ServiceA, DependencyCallback(async_callback))
+        self._container.register(ServiceC, DependencyPath("test.test_container.create_async_pool"), _group="async")
+
+        async def run():
+            pools = await asyncio.gather(*[self._container.list()["_index"][create_async_pool].ainstance() for i in range(5)])
+            service = await self.retrieve_instance(ServiceA).abuild()
+            group = await DependencyGroup("async").abuild(self._container.list())
+            return pools, service, group
+
+        pools, service, group = asyncio.run(run())
+
+        self.assertTrue(AsyncPool.created == 1)
+        self.assertTrue(all(pool is pools[0] for pool in pools))
+        self.assertTrue(pools[0].value == "1")
+        self.assertTrue(self._container.list()["_index"][create_async_pool].instance() is pools[0])
+        self.assertTrue(service.provider.value == "B.async")
+        self.assertTrue(group[0].providers is pools[0])
+
+    def test_circular(self):
+        self._container.register(CircularA, CircularB)
+        self._container.register(CircularB, CircularA)
+
+        with self.assertRaises(Exception) as context:
+            asyncio.run(asyncio.wait_for(self.retrieve_instance(CircularA).ainstance(), 2))
+        self.assertTrue("Circular dependency" in str(context.exception))
+
+class UnitOfWork:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+class Repository:
+    def __init__(self, uow):
+        self.uow = uow
+
+class TestScope(EasyDiTest):
+    def test(self):
+        self._container.register(UnitOfWork, _scope="request")
+        self._container.register(Repository, UnitOfWork)
+
+        with self.assertRaises(Exception):
+            self.retrieve_instance(UnitOfWork).instance()
+
+        with self._container.scope("request"):
+            uow = self.retrieve_instance(UnitOfWork).instance()
+            r1 = self.retrieve_instance(Repository).build()
+            r2 = self.retrieve_instance(Repository).build()
+            self.assertTrue(r1.uow is uow and r2.uow is uow)
+
+        self.assertTrue(uow.closed)
+
+        with self._container.scope("request"):
+            self.assertTrue(self.retrieve_instance(UnitOfWork).instance() is not uow)
+
+    def test_async(self):
+        self._container.register(UnitOfWork, _scope="request")
+        self._container.register(Repository, UnitOfWork)
+
+        async def handle():
+            async with self._container.scope("request"):
+                r1 = await self.retrieve_instance(Repository).abuild()
+                await asyncio.sleep(0.01)
+                r2 = await self.retrieve_instance(Repository).abuild()
+                self.assertTrue(r1.uow is r2.uow)
+                return r1.uow
+
+        async def run():
+            return await asyncio.gather(handle(), handle())
+
+        uow1, uow2 = asyncio.run(run())
+        self.assertTrue(uow1 is not uow2)
+        self.assertTrue(uow1.closed and uow2.closed)
+
+class GraphHelper:
+    pass
+
+class SlowGraphHelper:
+    created = 0
+
+    def __init__(self):
+        SlowGraphHelper.created += 1
+        time.sleep(0.05)
+
+class GraphProbe:
+    def __init__(self):
+        self.graph = easydi._GRAPH.get()
+
+class GraphLeft:
+    def __init__(self, helper):
+        self.helper = helper
+
+class GraphRight:
+    def __init__(self, helper):
+        self.helper = helper
+
+class GraphRoot:
+    def __init__(self, left, right):
+        self.left = left
+        self.right = right
+
+class TestGraphScope(EasyDiTest):
+    def register(self):
+        self._container.register(GraphHelper, _scope="graph")
+        self._container.register(GraphLeft, Dependency(GraphHelper, False))
+        self._container.register(GraphRight, Dependency(GraphHelper, False))
+        self._container.register(GraphRoot, Dependency(GraphLeft, False), Dependency(GraphRight, False))
+
+    def assertGraph(self, r1, r2):
+        self.assertTrue(isinstance(r1.left.helper, GraphHelper))
+        self.assertTrue(r1.left.helper is r1.right.helper)
+        self.assertTrue(r1.left.helper is not r2.left.helper)
+
+    def test(self):
+        self.register()
+        factory = self.retrieve_instance(GraphRoot)
+        self.assertGraph(factory.build(), factory.build())
+
+    def test_compiled(self):
+        self.register()
+        self._container.compile()
+        factory = self.retrieve_instance(GraphRoot)
+        self.assertGraph(factory.build(), factory.build())
+
+    def test_async(self):
+        self.register()
+        factory = self.retrieve_instance(GraphRoot)
+        self.assertGraph(asyncio.run(factory.abuild()), asyncio.run(factory.abuild()))
+
+    def test_opt_in(self):
+        self._container.register(GraphProbe)
+        self.assertTrue(self.retrieve_instance(GraphProbe).build().graph is None)
+
+        self.register()
+        self.assertTrue(self.retrieve_instance(GraphProbe).build().graph == {})
+        self.assertTrue(self._container.overlay().list().get("_graph") is True)
+
+    def test_parallel_group(self):
+        self._container.register(SlowGraphHelper, _scope="graph")
+        self._container.register(GraphLeft, Dependency(SlowGraphHelper, False), _group="members")
+        self._container.register(GraphRight, Dependency(SlowGraphHelper, False), _group="members")
+        self._container.register(ServiceC, DependencyGroup("members", False, False, _parallel=True))
+        SlowGraphHelper.created = 0
+
+        left, right = self.retrieve_instance(ServiceC).build().providers
+        self.assertTrue(left.helper is right.helper)
+        self.assertTrue(SlowGraphHelper.created == 1)
+
+class TestMemory(EasyDiTest):
+    def test(self):
+        # Same registration measured with the original storage layout
+        results = memory_layout.run(2000)
+        self.assertTrue(results["current"] < results["baseline"] * 0.9, results)
+
+        container = Container()
+        classes = memory_layout.create_classes(2)
+        for cls in classes:
+            container.register(cls, DependencyConfig("section1.key1"), [1])
+
+        factory = container.list()["_index"][classes[0]]
+        self.assertFalse(hasattr(factory, "__dict__"))
+        self.assertTrue(container.memory.pkg0.mod.MemoryClass0 is factory)
+
+    def test_dict_method_path(self):
+        # Path segment named like a dict method is still reachable as attribute
+        items = type("Handler", (), {"__module__": "myapp.items"})
+        get = type("Handler", (), {"__module__": "myapp.get"})
+        self._container.register(items)
+        self._container.register(get, _alias="keys")
+
+        for container in (self._container.overlay(), self._container.overlay(share_instances=False),
+                          self._container.freeze()):
+            self.assertTrue(container.myapp.items.Handler.class_object is items)
+            self.assertTrue(container.myapp.get.Handler.class_object is get)
+            self.assertTrue(container.list()._alias.keys.class_object is get)
+
+        # Config, myapp.items.Handler and myapp.get.Handler
+        self.assertTrue(len(self._container.list_object_factories()) == 3)
+
+class TestInstrumentation(EasyDiTest):
+    def test(self):
+        self._container.register(ProviderA, DependencyConfig("section1.key1"))
+        self._container.register(ServiceA, Dependency(ProviderA, False))
+        instrumentation = self._container.instrumentation
+        self.assertFalse(instrumentation.active)
+
+        created = []
+        post = lambda factory, instance, seconds, error: created.append((factory.name, seconds >= 0, error))
+        instrumentation.add_hook(post=post)
+        instrumentation.enable_stats()
+
+        with instrumentation.trace() as tree:
+            self.retrieve_instance(ServiceA).build()
+
+        self.assertTrue(created == [("ProviderA", True, None), ("ServiceA", True, None)])
+
+        node = tree["children"][0]
+        self.assertTrue(node["path"] == "test.test_container.ServiceA")
+        self.assertTrue(node["children"][0]["path"] == "test.test_container.ProviderA")
+
+        self.retrieve_instance(ServiceA).build()
+        stats = instrumentation.stats()
+        self.assertTrue(stats["test.test_container.ServiceA"]["count"] == 2)
+        self.assertTrue(stats["test.test_container.ProviderA"]["errors"] == 0)
+        self.assertTrue(len(instrumentation.export()) == 2)
+
+        instrumentation.remove_hook(post=post)
+        instrumentation.enable_stats(False)
+        self.assertFalse(instrumentation.active)
+
+class TestConfigCache(EasyDiTest):
+    def test(self):
+        self._container.register(ServiceB, DependencyConfig("section1.key1"))
+        self._container.config_cache.enable()
+        factory = self.retrieve_instance(ServiceB)
+
+        self.assertTrue(factory.build().get() == "1")
+        self._config.set("section1", "key1", "changed")
+        self.assertTrue(factory.build().get() == "1")
+
+        version = self._container.config_cache.version
+        self.assertTrue(self._container.config_cache.invalidate() == version + 1)
+        self.assertTrue(factory.build().get() == "changed")
+
+        self._container.config_cache.invalidate(reload=lambda: self._config.set("section1", "key1", "reloaded"))
+        self.assertTrue(asyncio.run(factory.abuild()).get() == "reloaded")
+
+        self._container.config_cache.enable(False)
+        self._config.set("section1", "key1", "direct")
+        self.assertTrue(factory.build().get() == "direct")
+
+class ExpensiveClient:
+    created = 0
+
+    def __init__(self):
+        ExpensiveClient.created += 1
+        self.uploaded = []
+
+    def upload(self, value):
+        self.uploaded.append(value)
+        return len(self.uploaded)
+
+class ErrorExporter:
+    def __init__(self, client):
+        self.client = client
+
+class TestDependencyLazy(EasyDiTest):
+    def test(self):
+        self._container.register(ExpensiveClient)
+        self._container.register(ErrorExporter, DependencyLazy(ExpensiveClient))
+
+        exporter = self.retrieve_instance(ErrorExporter).instance()
+        self.assertTrue(ExpensiveClient.created == 0)
+        self.assertTrue(repr(exporter.client) == "<LazyProxy unresolved>")
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(exporter.client.upload("x"))) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertTrue(ExpensiveClient.created == 1)
+        self.assertTrue(sorted(results) == [1, 2, 3, 4])
+        self.assertTrue(isinstance(exporter.client, ExpensiveClient))
+        self.assertTrue(exporter.client == self.retrieve_instance(ExpensiveClient).instance())
+
+    def test_operator(self):
+        proxy = DependencyLazy(DependencyCallback(lambda containers: 41)).build(self._container.list())
+        self.assertTrue(proxy + 1 == 42 and 1 + proxy == 42)
+        self.assertTrue(proxy < 42 and -proxy == -41)
+
+    def test_async(self):
+        self._container.register(create_async_pool, DependencyConfig("section1.key1"))
+        self._container.register(ErrorExporter, DependencyLazy(create_async_pool))
+        self._container.register(ServiceC, DependencyLazy(DependencyCallback(async_callback)))
+
+        exporter = asyncio.run(self.retrieve_instance(ErrorExporter).abuild())
+        service = asyncio.run(self.retrieve_instance(ServiceC).abuild())
+
+        for proxy in (exporter.client, service.providers):
+            with self.assertRaises(Exception) as context:
+                proxy.value
+            self.assertTrue("Lazy dependency" in str(context.exception))
+
+class TestDeferredImport(EasyDiTest):
+    def test(self):
+        sys.modules.pop("test.deferred_module", None)
+
+        self._container.register("test.deferred_module:DeferredService", DependencyConfig("section1.key1"))
+
+        self.assertFalse("test.deferred_module" in sys.modules)
+        report = self._container.deferred_report()
+        self.assertFalse(report["test.deferred_module"]["imported"])
+
+        factory = self._container.test.deferred_module.DeferredService
+        self.assertTrue(factory.name == "DeferredService")
+
+        service = factory.instance()
+        self.assertTrue("test.deferred_module" in sys.modules)
+        self.assertTrue(service.value == "1")
+
+        from test.deferred_module import DeferredService
+        self.assertTrue(Dependency(DeferredService).build(self._container.list()) is service)
+        self.assertTrue(DependencyPath("test.deferred_module.DeferredService").build(self._container.list()) is service)
+
+        report = self._container.deferred_report()
+        self.assertTrue(report["test.deferred_module"]["imported"])
+        self.assertTrue(report["test.deferred_module"]["seconds"] is not None)
+        self.assertTrue(report["test.deferred_module"]["objects"] == ["test.deferred_module.DeferredService"])
+
+class TestValidate(EasyDiTest):
+    def test(self):
+        self._container.register(ProviderA, DependencyConfig("section1.key1"))
+        self._container.register(ServiceA, ProviderA)
+        self.assertTrue(self._container.validate() == [])
+
+        self._container.register(CircularA, CircularB)
+        self._container.register(CircularB, CircularA)
+        self._container.register(ServiceC, DependencyPath("test.test_container.Missing"))
+
+        errors = self._container.validate(raise_error=False)
+        self.assertTrue("Circular dependency test.test_container.CircularA -> test.test_container.CircularB -> test.test_container.CircularA" in errors)
+        self.assertTrue("test.test_container.ServiceC : Object test.test_container.Missing is not register in containers" in errors)
+
+        with self.assertRaises(Exception):
+            self._container.validate()
+
+    def test_config(self):
+        container = Container()
+        container.register(ServiceB, DependencyConfig("section1.key1"))
+        errors = container.validate(raise_error=False)
+        self.assertTrue(len(errors) == 1 and "_config=True" in errors[0])
+
+    def test_callback_error(self):
+        self._container.register(CircularA, CircularB)
+        self._container.register(CircularB, CircularA)
+        self._container.register(BrokenProvider)
+
+        for target in (CircularA, BrokenProvider):
+            with self.assertRaises(Exception) as context:
+                DependencyCallback(lambda containers: target).build(self._container.list())
+            self.assertTrue("Unsupported object type" not in str(context.exception))
+            self.assertTrue(target.__name__ in str(context.exception))
+
+class TestOverlay(EasyDiTest):
+    def register(self):
+        self._container.register(ProviderA, DependencyConfig("section1.key1"), _group="providers")
+        self._container.register(ServiceA, ProviderA)
+
+    def test_shared(self):
+        self.register()
+        base_service = self.retrieve_instance(ServiceA).instance()
+
+        overlay = self._container.overlay()
+        overlay.register(ProviderA, DependencyConfig("section1.key2"), _group="providers")
+        overlay.register(ProviderB, DependencyConfig("section1.key2"), _group="providers")
+
+        self.assertTrue(overlay.test.test_container.ProviderA.instance().value == "A.2")
+        self.assertTrue(overlay.test.test_container.ServiceA.instance() is base_service)
+        self.assertTrue(overlay.list()["_index"][ServiceA] is self.retrieve_instance(ServiceA))
+        self.assertTrue(self.retrieve_instance(ProviderA).instance().value == "A.1")
+        self.assertTrue(ProviderB not in self._container.list()["_index"])
+
+        providers = DependencyGroup("providers").build(overlay.list())
+        self.assertTrue(sorted(provider.value for provider in providers) == ["A.2", "B.2"])
+        self.assertTrue(len(DependencyGroup("providers").build(self._container.list())) == 1)
+
+    def test_isolated(self):
+        self.register()
+        base_service = self.retrieve_instance(ServiceA).instance()
+
+        overlay = Container(self._container, share_instances=False)
+        overlay.register(ProviderA, DependencyConfig("section1.key2"))
+
+        service = overlay.test.test_container.ServiceA.instance()
+        self.assertTrue(service is not base_service)
+        self.assertTrue(service.provider.value == "A.2")
+        self.assertTrue(overlay.test.test_container.ServiceA.instance() is service)
+        self.assertTrue(base_service.provider.value == "A.1")
+        self.assertTrue(overlay.list()["_config"].instance() is not self._config)
+
+    def test_walk_parent(self):
+        self.register()
+        overlay = self._container.overlay(share_instances=False)
+        overlay.register(ProviderB, DependencyConfig("section1.key2"))
+
+        overlay.compile()
+        self.assertTrue(overlay.list()["_index"][ServiceA].compiled)
+        self.assertFalse(self.retrieve_instance(ServiceA).compiled)
+
+        self._container.register(ServiceC, DependencyPath("test.test_container.Missing"))
+        report = overlay.warmup()
+        self.assertTrue("test.test_container.ServiceA" in report["timings"])
+        self.assertTrue("test.test_container.ServiceC" in report["failures"])
+        self.assertTrue(len(overlay.validate(raise_error=False)) == 1)
+
+class PooledConnection:
+    def __init__(self, provider):
+        self.provider = provider
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+class TestPool(EasyDiTest):
+    def test(self):
+        self._container.register(ProviderA, DependencyConfig("section1.key1"))
+        self._container.register(PooledConnection, ProviderA, _pool=2, _pool_timeout=0.05)
+        factory = self.retrieve_instance(PooledConnection)
+
+        with factory.checkout() as first:
+            with factory.checkout() as second:
+                self.assertTrue(first is not second)
+                self.assertTrue(factory.pool.stats()["in_use"] == 2)
+                with self.assertRaises(Exception):
+                    with factory.checkout():
+                        pass
+            with factory.checkout() as third:
+                self.assertTrue(third is second)
+
+        stats = factory.pool.stats()
+        self.assertTrue((stats["created"], stats["idle"], stats["timeouts"]) == (2, 2, 1))
+
+        with self.assertRaises(Exception):
+            factory.instance()
+
+        with self._container.scope("request"):
+            connection = factory.instance()
+            self.assertTrue(factory.instance() is connection)
+            self.assertTrue(factory.pool.stats()["in_use"] == 1)
+        self.assertTrue(factory.pool.stats()["in_use"] == 0)
+        self.assertFalse(connection.closed)
+
+    def test_idle(self):
+        self._container.register(ProviderA, DependencyConfig("section1.key1"))
+        self._container.register(PooledConnection, ProviderA, _pool=4, _pool_idle=0)
+        factory = self.retrieve_instance(PooledConnection)
+
+        with factory.checkout() as connection:
+            pass
+        self.assertTrue(connection.closed)
+        self.assertTrue(factory.pool.stats()["evicted"] == 1)
+
+    def test_threads(self):
+        self._container.register(ProviderA, DependencyConfig("section1.key1"))
+        self._container.register(PooledConnection, ProviderA, _pool=3)
+        factory = self.retrieve_instance(PooledConnection)
+        seen = set()
+
+        def worker():
+            for _ in range(50):
+                with factory.checkout() as connection:
+                    seen.add(id(connection))
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertTrue(len(seen) <= 3)
+        self.assertTrue(factory.pool.stats()["in_use"] == 0)
+
+class TenantClient:
+    created = 0
+
+    def __init__(self, provider, tenant, region="eu"):
+        TenantClient.created += 1
+        self.provider = provider
+        self.tenant = tenant
+        self.region = region
+
+class SlowLookup:
+    created = 0
+
+    def __init__(self):
+        SlowLookup.created += 1
+        time.sleep(0.05)
+
+class TestInstanceCache(EasyDiTest):
+    def test(self):
+        self._container.register(ProviderA, DependencyConfig("section1.key1"))
+        self._container.register(TenantClient, ProviderA, _cache=2)
+        factory = self.retrieve_instance(TenantClient)
+
+        a = factory.instance("a")
+        self.assertTrue(factory.instance("a") is a)
+        self.assertTrue(factory.instance("a", region="us") is not a)
+        self.assertTrue(factory.instance("b").tenant == "b")
+        self.assertTrue(factory.instance("a") is not a)
+
+        stats = factory.cache.stats()
+        self.assertTrue((stats["size"], stats["hits"], stats["misses"], stats["evictions"]) == (2, 1, 4, 2))
+
+        self.assertTrue(factory.cache.invalidate("b"))
+        self.assertFalse(factory.cache.invalidate("b"))
+
+    def test_ttl(self):
+        self._container.register(ProviderA, DependencyConfig("section1.key1"))
+        self._container.register(TenantClient, ProviderA, _cache=8, _cache_ttl=0.05)
+        factory = self.retrieve_instance(TenantClient)
+
+        a = factory.instance("a")
+        time.sleep(0.06)
+        self.assertTrue(factory.instance("a") is not a)
+        self.assertTrue(factory.cache.stats()["expired"] == 1)
+
+    def test_threads(self):
+        self._container.register(ProviderA, DependencyConfig("section1.key1"))
+        self._container.register(SlowLookup, _cache=4)
+        factory = self.retrieve_instance(SlowLookup)
+
+        instances = []
+        threads = [threading.Thread(target=lambda: instances.append(factory.instance())) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertTrue(SlowLookup.created == 1)
+        self.assertTrue(all(instance is instances[0] for instance in instances))
+
+    def test_async(self):
+        self._container.register(ProviderA, DependencyConfig("section1.key1"))
+        self._container.register(TenantClient, ProviderA, _cache=4)
+        factory = self.retrieve_instance(TenantClient)
+
+        async def resolve():
+            return await asyncio.gather(factory.ainstance("a"), factory.ainstance("a"), factory.ainstance("b"))
+
+        a1, a2, b = asyncio.run(resolve())
+        self.assertTrue(a1 is a2 and a1 is not b)
+        self.assertTrue(factory.instance("a") is a1)
+
+class ForkSafeTable:
+    def __init__(self):
+        self.pid = os.getpid()
+
+class ForkUnsafeClient:
+    def __init__(self, table):
+        self.table = table
+        self.pid = os.getpid()
+
+class ForkUnsafeConnection:
+    def __init__(self):
+        self.pid = os.getpid()
+
+class ForkSafeRepository:
+    def __init__(self, connection):
+        self.connection = connection
+
+@unittest.skipUnless(hasattr(os, "fork"), "Require os.fork")
+class TestFork(EasyDiTest):
+    def test(self):
+        self._container.register(ForkSafeTable)
+        self._container.register(ForkUnsafeClient, ForkSafeTable, _fork_safe=False)
+        table = self.retrieve_instance(ForkSafeTable)
+        client = self.retrieve_instance(ForkUnsafeClient)
+
+        report = self._container.prefork()
+        self.assertTrue("test.test_container.ForkSafeTable" in report["timings"])
+        self.assertTrue("test.test_container.ForkUnsafeClient" not in report["timings"])
+        parent_client = client.instance()
+
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            try:
+                child_client = client.instance()
+                result = (table.instance().pid == os.getppid() and child_client is not parent_client
+                          and child_client.pid == os.getpid() and child_client.table is table.instance())
+                os.write(write_fd, b"1" if result else b"0")
+            finally:
+                os._exit(0)
+
+        os.close(write_fd)
+        result = os.read(read_fd, 1)
+        os.close(read_fd)
+        os.waitpid(pid, 0)
+
+        self.assertTrue(result == b"1")
+        self.assertTrue(client.instance() is parent_client)
+
+    def test_dependency(self):
+        # Fork safe object depending on fork unsafe object is left to the worker as well
+        self._container.register(ForkUnsafeConnection, _fork_safe=False)
+        self._container.register(ForkSafeRepository, ForkUnsafeConnection)
+        connection = self.retrieve_instance(ForkUnsafeConnection)
+        repository = self.retrieve_instance(ForkSafeRepository)
+
+        report = self._container.prefork()
+        self.assertTrue("test.test_container.ForkSafeRepository" not in report["timings"])
+        self.assertFalse(connection.created or repository.created)
+
+        # Created in the master anyway
+        parent_repository = repository.instance()
+
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            try:
+                child_repository = repository.instance()
+                result = (child_repository is not parent_repository
+                          and child_repository.connection.pid == os.getpid())
+                os.write(write_fd, b"1" if result else b"0")
+            finally:
+                os._exit(0)
+
+        os.close(write_fd)
+        result = os.read(read_fd, 1)
+        os.close(read_fd)
+        os.waitpid(pid, 0)
+
+        self.assertTrue(result == b"1")
+        self.assertTrue(repository.instance() is parent_repository)
+
+class TestResolveMany(EasyDiTest):
+    def test(self):
+        self._container.register(ProviderA, DependencyConfig("section1.key1"))
+        self._container.register(ServiceA, ProviderA)
+
+        service, provider, again = self._container.resolve_many(
+            [ServiceA, "test.test_container.ProviderA", "test.test_container:ServiceA"])
+        self.assertTrue(service is again and service.provider is provider)
+
+        services = self._container.resolve_many([ServiceA, ProviderA], as_dict=True, parallel=True)
+        self.assertTrue(services[ServiceA] is service and services[ProviderA] is provider)
+
+        with self.assertRaises(Exception):
+            self._container.resolve_many([ServiceB])
+
+    def test_graph(self):
+        self._container.register(GraphHelper, _scope="graph")
+        self._container.register(GraphLeft, Dependency(GraphHelper, False))
+        self._container.register(GraphRight, Dependency(GraphHelper, False))
+
+        for parallel in (False, True):
+            left, right = self._container.resolve_many([GraphLeft, GraphRight], build=True, parallel=parallel)
+            self.assertTrue(left.helper is right.helper)
+            self.assertTrue(left is not self._container.resolve_many([GraphLeft], build=True)[0])
+
+class ClosingDatabase:
+    closed = []
+
+    def close(self):
+        ClosingDatabase.closed.append("database")
+
+class ClosingRepository:
+    def __init__(self, database):
+        self.database = database
+
+    def close(self):
+        ClosingDatabase.closed.append("repository")
+
+class ClosingService:
+    def __init__(self, repository):
+        self.repository = repository
+
+    def __exit__(self, *exc_info):
+        ClosingDatabase.closed.append("service")
+
+class HangingClient:
+    def close(self):
+        time.sleep(0.5)
+
+class BrokenClient:
+    def close(self):
+        raise Exception("Broken close")
+
+class AsyncClient:
+    closed = False
+
+    async def aclose(self):
+        await asyncio.sleep(0)
+        AsyncClient.closed = True
+
+class HangingService:
+    release = threading.Event()
+
+    def __init__(self, database):
+        self.database = database
+
+    def close(self):
+        HangingService.release.wait(2)
+
+class TestClose(EasyDiTest):
+    def register(self):
+        ClosingDatabase.closed = []
+        self._container.register(ClosingDatabase)
+        # Transient repository between service and database
+        self._container.register(ClosingRepository, ClosingDatabase)
+        self._container.register(ClosingService, Dependency(ClosingRepository, False))
+
+    def test(self):
+        self.register()
+        self._container.register(ProviderA, DependencyConfig("section1.key1"),
+                                 _finalizer=lambda provider: ClosingDatabase.closed.append(provider.value))
+        self._container.register(HangingClient)
+        self._container.register(BrokenClient)
+
+        for obj in (ClosingService, ProviderA, HangingClient, BrokenClient):
+            self.retrieve_instance(obj).instance()
+
+        report = self._container.close(timeout=0.1)
+        self.assertTrue(ClosingDatabase.closed.index("service") < ClosingDatabase.closed.index("database"))
+        self.assertTrue("A.1" in ClosingDatabase.closed)
+        self.assertTrue("repository" not in ClosingDatabase.closed)
+        self.assertTrue(report["timeouts"] == ["test.test_container.HangingClient"])
+        self.assertTrue(list(report["failures"].keys()) == ["test.test_container.BrokenClient"])
+        self.assertTrue("test.test_container.ClosingService" in report["timings"])
+        self.assertFalse(self.retrieve_instance(ClosingDatabase).created)
+
+    def test_async(self):
+        self.register()
+        self._container.register(AsyncClient)
+        self.retrieve_instance(ClosingService).instance()
+        self.retrieve_instance(AsyncClient).instance()
+
+        report = asyncio.run(self._container.aclose(timeout=1))
+        self.assertTrue(ClosingDatabase.closed == ["service", "database"])
+        self.assertTrue(AsyncClient.closed)
+        self.assertTrue("test.test_container.AsyncClient" in report["timings"])
+        self.assertTrue(not len(report["failures"]) and not len(report["timeouts"]))
+
+    def test_timeout(self):
+        self.register()
+        self._container.register(HangingService, ClosingDatabase)
+        self._container.register(ProviderA, DependencyConfig("section1.key1"))
+        self._container.register(BrokenClient)
+        for obj in (HangingService, ClosingService, ProviderA, BrokenClient):
+            self.retrieve_instance(obj).instance()
+
+        # Timeout start with each object dispose, dependency of timed out object is still in use
+        HangingService.release.clear()
+        try:
+            report = self._container.close(timeout=0.1, max_workers=1)
+        finally:
+            HangingService.release.set()
+        self.assertTrue(report["timeouts"] == ["test.test_container.HangingService"])
+        self.assertTrue(report["skipped"] == ["test.test_container.ClosingDatabase"])
+        self.assertTrue("test.test_container.ProviderA" in report["timings"])
+        self.assertTrue(list(report["failures"].keys()) == ["test.test_container.BrokenClient"])
+        self.assertTrue(ClosingDatabase.closed == ["service"])
+
+    def test_async_blocking(self):
+        self.register()
+        self._container.register(HangingService, ClosingDatabase)
+        self.retrieve_instance(HangingService).instance()
+
+        # Synchronous close() does not block the event loop
+        async def aclose():
+            start = time.monotonic()
+            report = await self._container.aclose(timeout=0.1)
+            elapsed = time.monotonic() - start
+            # asyncio.run wait for executor thread on exit
+            HangingService.release.set()
+            return report, elapsed
+
+        HangingService.release.clear()
+        try:
+            report, elapsed = asyncio.run(aclose())
+        finally:
+            HangingService.release.set()
+        self.assertTrue(report["timeouts"] == ["test.test_container.HangingService"])
+        self.assertTrue(report["skipped"] == ["test.test_container.ClosingDatabase"])
+        self.assertTrue(elapsed < 1)
+
+    def test_pool(self):
+        self._container.register(ProviderA, DependencyConfig("section1.key1"))
+        self._container.register(PooledConnection, ProviderA, _pool=2)
+        factory = self.retrieve_instance(PooledConnection)
+
+        idle, connection = factory.pool.acquire(), factory.pool.acquire()
+        factory.pool.release(idle)
+        self._container.close()
+        self.assertTrue(idle.closed and not connection.closed)
+        factory.pool.release(connection)
+        self.assertTrue(connection.closed)
+
+        # Pool is usable again after close
+        with factory.checkout() as again:
+            self.assertTrue(again is not connection and not again.closed)
+
+# typing.Annotated require Python 3.9
+AutowireName = (typing.Annotated[str, DependencyConfig("section1.key2")] if hasattr(typing, "Annotated")
+                else str)
+
+class AutowireRepository:
+    def __init__(self, provider: ProviderA, name: AutowireName):
+        self.provider = provider
+        self.name = name
+
+class AutowireService:
+    def __init__(self, repository: AutowireRepository, client: typing.Optional[ServiceB] = None, retry: int = 3):
+        self.repository = repository
+        self.client = client
+        self.retry = retry
+
+@unittest.skipUnless(hasattr(typing, "Annotated"), "Require typing.Annotated")
+class TestAutowire(EasyDiTest):
+    def test(self):
+        self._container.register(ProviderA, DependencyConfig("section1.key1"))
+        self._container.register(AutowireRepository, _autowire=True)
+        self._container.register(AutowireService, retry=5, _autowire=True)
+
+        service = self.retrieve_instance(AutowireService).instance()
+        self.assertTrue(service.repository is self.retrieve_instance(AutowireRepository).instance())
+        self.assertTrue(service.repository.provider is self.retrieve_instance(ProviderA).instance())
+        self.assertTrue(service.repository.name == "2")
+        self.assertTrue(service.client is None and service.retry == 5)
+
+        # Plan is read once per class
+        self.assertTrue(easydi._AUTOWIRE_PLANS[AutowireService] is easydi._autowire_plan(AutowireService))
+
+    def test_validate(self):
+        self._container.register(AutowireRepository, _autowire=True)
+        with self.assertRaises(Exception):
+            self._container.validate()
+
+        self._container.register(ProviderA, DependencyConfig("section1.key1"))
+        self._container.compile()
+        self.assertTrue(self.retrieve_instance(AutowireRepository).instance().provider.value == "A.1")
+
+class RetainedModel:
+    created = 0
+
+    def __init__(self):
+        type(self).created += 1
+        self.weights = list(range(20000))
+
+class RetainedTable(RetainedModel):
+    pass
+
+class RetainedLookup(RetainedModel):
+    pass
+
+class RetainedReport:
+    def __init__(self, table):
+        self.table = table
+
+class TestRetention(EasyDiTest):
+    def test_weak(self):
+        self._container.register(RetainedModel, _retain="weak")
+        factory = self.retrieve_instance(RetainedModel)
+
+        model = factory.instance()
+        self.assertTrue(factory.instance() is model and RetainedModel.created == 1)
+        self.assertTrue(self._container.memory_report()["test.test_container.RetainedModel"]["retain"] == "weak")
+
+        del model
+        gc.collect()
+        self.assertFalse(factory.created)
+        factory.instance()
+        self.assertTrue(RetainedModel.created == 2)
+
+    def test_idle(self):
+        self._container.register(RetainedLookup, _retain_idle=60)
+        factory = self.retrieve_instance(RetainedLookup)
+
+        now = [1000.0]
+        with unittest.mock.patch.object(easydi.RetainedInstance, "_clock", staticmethod(lambda: now[0])):
+            lookup = factory.instance()
+            now[0] += 59
+            self.assertTrue(self._container.memory_budget.evict() == [])
+            self.assertTrue(factory.instance() is lookup)
+            now[0] += 60
+            self.assertTrue(self._container.memory_budget.evict() == ["test.test_container.RetainedLookup"])
+            self.assertTrue(factory.instance() is not lookup)
+
+    def test_budget(self):
+        self._container.register(RetainedTable, _retain="evictable")
+        self._container.register(RetainedLookup, _retain="evictable")
+        self._container.register(RetainedReport, RetainedTable)
+
+        report = self.retrieve_instance(RetainedReport).instance()
+        size = self._container.memory_budget.report()["test.test_container.RetainedTable"]["bytes"]
+        self.assertTrue(size > 20000 * 8)
+
+        # Least recently used instance is evicted when budget is exceeded, dependent object keep its reference
+        self._container.memory_budget.limit(int(size * 1.5))
+        lookup = self.retrieve_instance(RetainedLookup).instance()
+        self.assertFalse(self.retrieve_instance(RetainedTable).created)
+        self.assertTrue(self.retrieve_instance(RetainedLookup).created and report.table.weights)
+        self.assertTrue(self._container.memory_budget.total() <= size * 1.5)
+
+        memory = self._container.memory_report()
+        self.assertTrue("test.test_container.RetainedTable" not in memory)
+        self.assertTrue(memory["test.test_container.RetainedLookup"]["retain"] == "evictable")
+        # Referenced table is counted in the report even after it is evicted
+        self.assertTrue(memory["test.test_container.RetainedReport"]["bytes"] >= size)
+
+        with self.assertRaises(Exception):
+            self._container.register(RetainedModel, _retain="weak", _retain_idle=1)